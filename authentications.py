@@ -1,10 +1,12 @@
 from dataclasses import dataclass, field
+from collections import OrderedDict
+import hashlib
 import os
-import requests
+import threading
+import time
 import jwt
-from uuid import uuid4
 from dotenv import load_dotenv
-from typing import Optional, Literal, TypedDict, Mapping
+from typing import Any, Iterable, Optional, Literal, TypedDict, Mapping
 from django.http import HttpRequest
 
 # from django.contrib.auth.models import AnonymousUser
@@ -12,7 +14,13 @@ from django.http import HttpRequest
 from rest_framework import authentication, exceptions
 from rest_framework.request import Request
 
-from common_module.utils import aware_utcnow, datetime_from_epoch
+from common_module.exceptions import ServiceUnavailableException
+from common_module.utils import (
+    CircuitOpenError,
+    DeadlineExceeded,
+    ServerRequests,
+    datetime_from_epoch,
+)
 
 load_dotenv()
 
@@ -53,31 +61,72 @@ class Token:
 USER_CACHE_KEY = lambda x: f"GATEWAY:user:{x}:cached"
 
 
+# 유저 스냅샷 캐시 TTL (초)
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "3600"))
+
+
+def user_snapshot_codec():
+    from .caches import ModelTupleCodec
+
+    return ModelTupleCodec()
+
+
 def has_user_cached(token: Token):
+    # 캐시에는 concrete field 값만 담긴 스냅샷이 저장되어 있습니다
     from .caches import cache
+    from .metrics import mark_hit, measure
 
-    cached = cache.get(USER_CACHE_KEY(token.user_id))
-    if cached:
-        print("hit cached!@!#@$%#")
-        return cached
-    return False
+    with measure("user", "get"):
+        snapshot = cache.get(USER_CACHE_KEY(token.user_id))
+        cached = False
+        if snapshot:
+            try:
+                cached = user_snapshot_codec().unpack(snapshot)
+            except Exception:
+                # 이전 형식(모델 pickle)이나 스키마가 바뀐 스냅샷은 미스로 취급합니다
+                cached = False
+        mark_hit(bool(cached))
+    return cached
 
 
 def set_user_cache(user):
     from .caches import cache
+    from .metrics import measure
+
+    with measure("user", "set"):
+        snapshot = user_snapshot_codec().pack(user)
+        cache.set(USER_CACHE_KEY(user.pk), snapshot, USER_CACHE_TTL)
+
+
+def invalidate_user_cache(user_id: int):
+    from .caches import cache
+
+    cache.delete(USER_CACHE_KEY(user_id))
+
+
+async def ainvalidate_user_cache(user_id: int):
+    from .caches import cache, get_async_redis_connection
 
-    cache.set(USER_CACHE_KEY(user.pk), user)
+    await get_async_redis_connection().delete(cache.make_key(USER_CACHE_KEY(user_id)))
+
+
+def is_user_changed(user, token: Token):
+    return user.nickname != token.nickname or user.username != token.username
 
 
 def check_user_changed(user, token: Token):
-    if user.nickname != token.nickname or user.username != token.username:
-        user.nickname = token.nickname
-        user.username = token.username
-        user.save()
-        user.refresh_from_db()
+    # 바뀐 필드만 UPDATE 합니다. 반환값은 변경 여부
+    if not is_user_changed(user, token):
+        return False
+    user.nickname = token.nickname
+    user.username = token.username
+    user.save(update_fields=["nickname", "username"])
+    return True
 
 
 def create_user(user_class, token: Token):
+    from django.db import IntegrityError, transaction
+
     is_staff = "staff" in token.role
     user = user_class(
         nickname=token.nickname,
@@ -85,28 +134,187 @@ def create_user(user_class, token: Token):
         id=token.user_id,
         is_staff=is_staff,
     )
-    user.set_password(str(uuid4()))
-    user.save()
-    user.refresh_from_db()
+    # 외부 인증만 쓰므로 비밀번호 해싱 비용을 들이지 않습니다
+    user.set_unusable_password()
+    try:
+        with transaction.atomic():
+            user.save(force_insert=True)
+    except IntegrityError:
+        # 동시에 들어온 다른 요청이 먼저 만들었습니다
+        user = user_class.objects.get(id=token.user_id)
+        check_user_changed(user, token)
     return user
 
 
 def get_or_create_user(token: Token):
     from django.contrib.auth import get_user_model
+    from django.db import DatabaseError
 
     cached = has_user_cached(token)
-    if cached:
+    if cached and not is_user_changed(cached, token):
         return cached
-    User = get_user_model()
-    user = User.objects.filter(id=token.user_id).first()
-    if user:
-        check_user_changed(user, token)
-    else:
-        user = create_user(User, token)
+    user = None
+    if cached:
+        try:
+            check_user_changed(cached, token)
+            user = cached
+        except DatabaseError:
+            # 캐시 TTL 안에 행이 지워졌으면 스냅샷을 버리고 DB 에서 다시 찾습니다
+            invalidate_user_cache(token.user_id)
+    if user is None:
+        User = get_user_model()
+        user = User.objects.filter(id=token.user_id).first()
+        if user:
+            check_user_changed(user, token)
+        else:
+            user = create_user(User, token)
     set_user_cache(user)
     return user
 
 
+async def ahas_user_cached(token: Token):
+    # has_user_cached 의 async 버전 (같은 키, 같은 스냅샷 형식)
+    from .caches import cache, get_async_redis_connection
+    from .metrics import mark_hit, measure
+
+    with measure("user", "get"):
+        key = cache.make_key(USER_CACHE_KEY(token.user_id))
+        value = await get_async_redis_connection().get(key)
+        cached = False
+        if value is not None:
+            try:
+                cached = user_snapshot_codec().unpack(cache.client.decode(value))
+            except Exception:
+                cached = False
+        mark_hit(bool(cached))
+    return cached
+
+
+async def aset_user_cache(user):
+    from .caches import cache, get_async_redis_connection
+    from .metrics import measure
+
+    with measure("user", "set"):
+        key = cache.make_key(USER_CACHE_KEY(user.pk))
+        value = cache.client.encode(user_snapshot_codec().pack(user))
+        await get_async_redis_connection().set(key, value, ex=USER_CACHE_TTL)
+
+
+async def acheck_user_changed(user, token: Token):
+    from django.db import DatabaseError
+
+    if not is_user_changed(user, token):
+        return False
+    user.nickname = token.nickname
+    user.username = token.username
+    updated = await user.__class__.objects.filter(pk=user.pk).aupdate(
+        nickname=token.nickname, username=token.username
+    )
+    if not updated:
+        # save(update_fields=...) 와 같은 예외로 맞춥니다
+        raise DatabaseError("Save with update_fields did not affect any rows.")
+    return True
+
+
+async def acreate_user(user_class, token: Token):
+    from django.db import IntegrityError
+
+    user = user_class(
+        nickname=token.nickname,
+        username=token.username,
+        id=token.user_id,
+        is_staff="staff" in token.role,
+    )
+    user.set_unusable_password()
+    values = {f.attname: getattr(user, f.attname) for f in user._meta.concrete_fields}
+    try:
+        return await user_class.objects.acreate(**values)
+    except IntegrityError:
+        user = await user_class.objects.aget(id=token.user_id)
+        await acheck_user_changed(user, token)
+        return user
+
+
+async def aget_or_create_user(token: Token):
+    from django.contrib.auth import get_user_model
+    from django.db import DatabaseError
+
+    cached = await ahas_user_cached(token)
+    if cached and not is_user_changed(cached, token):
+        return cached
+    user = None
+    if cached:
+        try:
+            await acheck_user_changed(cached, token)
+            user = cached
+        except DatabaseError:
+            await ainvalidate_user_cache(token.user_id)
+    if user is None:
+        User = get_user_model()
+        user = await User.objects.filter(id=token.user_id).afirst()
+        if user:
+            await acheck_user_changed(user, token)
+        else:
+            user = await acreate_user(User, token)
+    await aset_user_cache(user)
+    return user
+
+
+def sync_users(records: Iterable[Token | Mapping], batch_size: int = 500) -> int:
+    """
+    Token 이나 인증서버 유저 레코드 목록을 배치 단위로 upsert 하고
+    유저 캐시를 미리 채웁니다. 배포 직후 트래픽 전에 호출하세요.
+    반환값은 처리한 유저 수
+    """
+    from django.contrib.auth import get_user_model
+    from django.db import connections, router
+    from .caches import cache
+
+    User = get_user_model()
+    codec = user_snapshot_codec()
+    count = 0
+    batch: dict[int, Any] = {}
+    conflict_options: dict[str, Any] = {
+        "update_conflicts": True,
+        "update_fields": ["nickname", "username", "is_staff"],
+    }
+    # MySQL 은 ON DUPLICATE KEY UPDATE 라서 충돌 대상 컬럼을 지정할 수 없습니다
+    connection = connections[router.db_for_write(User)]
+    if connection.features.supports_update_conflicts_with_target:
+        conflict_options["unique_fields"] = ["id"]
+
+    def flush():
+        if not batch:
+            return
+        User.objects.bulk_create(batch.values(), **conflict_options)
+        # DB 기본값까지 반영된 값으로 캐시합니다
+        users = User.objects.filter(id__in=batch.keys())
+        cache.set_many(
+            {USER_CACHE_KEY(user.pk): codec.pack(user) for user in users},
+            USER_CACHE_TTL,
+        )
+        batch.clear()
+
+    for record in records:
+        get = record.get
+        user_id = get("user_id") or get("id")
+        role = get("role") or []
+        user = User(
+            id=user_id,
+            nickname=get("nickname") or "",
+            username=get("username") or "",
+            is_staff=bool(get("is_staff")) or "staff" in role,
+        )
+        user.set_unusable_password()
+        # 같은 배치 안의 중복 id 는 마지막 레코드를 씁니다
+        batch[user_id] = user
+        count += 1
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return count
+
+
 def get_jwt_token_from_dict(data: dict):
     bearer_token: Optional[str] = data.get("HTTP_AUTHORIZATION")
     if not bearer_token:
@@ -119,37 +327,203 @@ def get_jwt_token_from_dict(data: dict):
     return splitted[1]
 
 
+class JWTKeyStore:
+    """
+    서명 검증용 키. JWT_SECRET(HS) 또는 JWKS_URL 에서 한번 읽어두고
+    JWKS 는 백그라운드 쓰레드에서 JWKS_REFRESH_INTERVAL 초마다 갱신합니다.
+    """
+
+    def __init__(self):
+        self.verify = os.getenv("JWT_VERIFY_SIGNATURE", "true").lower() != "false"
+        self.algorithms = os.getenv("JWT_ALGORITHMS", "HS256").split(",")
+        self.secret = os.getenv("JWT_SECRET")
+        self.jwks_url = os.getenv("JWKS_URL")
+        self.refresh_interval = int(os.getenv("JWKS_REFRESH_INTERVAL", "300"))
+        self.jwks_client: Optional[jwt.PyJWKClient] = None
+        self._lock = threading.Lock()
+
+    def get_jwks_client(self) -> jwt.PyJWKClient:
+        if self.jwks_client is None:
+            with self._lock:
+                if self.jwks_client is None:
+                    self.jwks_client = jwt.PyJWKClient(
+                        self.jwks_url, cache_keys=True, lifespan=self.refresh_interval
+                    )
+                    threading.Thread(target=self._refresh_jwks, daemon=True).start()
+        return self.jwks_client
+
+    def _refresh_jwks(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.get_jwks_client().get_jwk_set(refresh=True)
+            except Exception:
+                pass
+
+    def get_key(self, access_token: str):
+        if self.jwks_url:
+            return self.get_jwks_client().get_signing_key_from_jwt(access_token).key
+        if self.secret:
+            return self.secret
+        # 키가 없으면 검증을 통과시키지 않습니다
+        raise exceptions.NotAuthenticated
+
+    def decode(self, access_token: str) -> dict:
+        if not self.verify:
+            return jwt.decode(access_token, options={"verify_signature": False})
+        # 만료 여부는 InternalJWTAuthentication.check_exp 에서 확인합니다
+        return jwt.decode(
+            access_token,
+            self.get_key(access_token),
+            algorithms=self.algorithms,
+            options={"verify_exp": False},
+        )
+
+
+class TokenCache:
+    """
+    토큰 digest -> 검증된 Token 을 exp 까지 보관하는 프로세스 내 LRU
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data: OrderedDict[bytes, tuple[float, Token]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def digest(self, access_token: str) -> bytes:
+        return hashlib.sha256(access_token.encode()).digest()
+
+    def get(self, access_token: str) -> Optional[Token]:
+        key = self.digest(access_token)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, access_token: str, token: Token):
+        try:
+            expires = float(token.exp)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._data[self.digest(access_token)] = (expires, token)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+jwt_key_store = JWTKeyStore()
+token_cache = TokenCache(int(os.getenv("JWT_CACHE_SIZE", "4096")))
+
+
 def parse_jwt(access_token: str) -> Token:
+    cached = token_cache.get(access_token)
+    if cached:
+        return cached
     try:
-        token = jwt.decode(access_token, options={"verify_signature": False})
-        return Token(**token)
+        token = Token(**jwt_key_store.decode(access_token))
     except:
         raise exceptions.NotAuthenticated
+    token_cache.set(access_token, token)
+    return token
+
+
+async def aparse_jwt(access_token: str) -> Token:
+    # JWKS 는 키 조회가 블로킹 HTTP 라서 이벤트 루프 밖에서 검증합니다
+    import asyncio
+
+    cached = token_cache.get(access_token)
+    if cached:
+        return cached
+    if jwt_key_store.verify and jwt_key_store.jwks_url:
+        return await asyncio.to_thread(parse_jwt, access_token)
+    return parse_jwt(access_token)
+
+
+THIRD_PARTY_CACHE_KEY = lambda x: f"GATEWAY:third_party:{x}:cached"
+
+# 같은 토큰의 동시 요청을 하나로 합치기 위한 토큰별 락
+_inflight: dict[str, threading.Lock] = {}
+_inflight_lock = threading.Lock()
 
 
 class ThirdPartyAuthentication(authentication.BaseAuthentication):
+    """
+    인증서버 결과를 Authorization 헤더 digest 로 캐시합니다.
+    성공은 THIRD_PARTY_AUTH_TTL 초(토큰 exp 까지로 제한), 401/403/404 는
+    THIRD_PARTY_AUTH_NEGATIVE_TTL 초 동안 캐시합니다.
+    그 외 응답(5xx, 429 등)은 캐시하지 않고 503 으로 실패합니다.
+    """
+
+    ttl = int(os.getenv("THIRD_PARTY_AUTH_TTL", "60"))
+    negative_ttl = int(os.getenv("THIRD_PARTY_AUTH_NEGATIVE_TTL", "5"))
+    negative_statuses = (401, 403, 404)
+
     def authenticate(self, request: HttpRequest):
+        from .caches import cache
+
         http_authorization = request.META.get("HTTP_AUTHORIZATION", "")
-        resp = requests.post(
-            os.getenv("AUTH_SERVER", "") + "/users/authenticate/",
-            headers={"Authorization": http_authorization},
-            timeout=5,
-        )
-        if resp.status_code != 200:
+        digest = hashlib.sha256(http_authorization.encode()).hexdigest()
+        key = THIRD_PARTY_CACHE_KEY(digest)
+        user = cache.get(key)
+        if user is None:
+            with _inflight_lock:
+                lock = _inflight.setdefault(key, threading.Lock())
+            try:
+                with lock:
+                    # 먼저 락을 잡은 요청이 채워뒀을 수 있습니다
+                    user = cache.get(key)
+                    if user is None:
+                        user = self.fetch_user(http_authorization)
+                        cache.set(key, user, self.get_timeout(user))
+            finally:
+                with _inflight_lock:
+                    _inflight.pop(key, None)
+        if not user:
             raise exceptions.AuthenticationFailed("No such user")
-        user: Token = resp.json()
 
         return (user, None)  # authentication successful
 
+    def fetch_user(self, http_authorization: str) -> Token | Literal[False]:
+        auth_server = ServerRequests(os.getenv("AUTH_SERVER", ""), http_authorization)
+        try:
+            resp = auth_server.post("/users/authenticate/", timeout=5)
+        except (CircuitOpenError, DeadlineExceeded):
+            # 인증서버 장애시 기다리지 않고 바로 실패합니다 (캐시하지 않음)
+            raise ServiceUnavailableException
+        if resp.status_code in self.negative_statuses:
+            return False
+        if resp.status_code != 200:
+            # 인증서버 일시 장애로 정상 토큰이 막히지 않도록 캐시하지 않습니다
+            raise ServiceUnavailableException
+        return resp.json()
+
+    def get_timeout(self, user: Token | Literal[False]) -> int:
+        if not user:
+            return self.negative_ttl
+        try:
+            remaining = int(float(user.get("exp")) - time.time())
+        except (TypeError, ValueError):
+            return self.ttl
+        return max(min(self.ttl, remaining), 0)
+
 
 class InternalJWTAuthentication(authentication.BaseAuthentication):
     def check_exp(self, payload: Token, claim="exp", current_time=None):
-        if current_time is None:
-            current_time = aware_utcnow()
         try:
             claim_value = payload[claim]
         except:
             return False
+        if current_time is None:
+            # epoch 끼리 바로 비교합니다
+            try:
+                return float(claim_value) > time.time()
+            except (TypeError, ValueError):
+                return False
         claim_time = datetime_from_epoch(claim_value)
         if claim_time <= current_time:
             return False
@@ -166,3 +540,55 @@ class InternalJWTAuthentication(authentication.BaseAuthentication):
         user = get_or_create_user(parsed)
         print(user, parsed)
         return (user, parsed)
+
+    async def aauthenticate_token(self, jwt: Optional[str]):
+        # authenticate 와 같은 규칙으로 토큰을 검사합니다 (DB/캐시는 async)
+        if not jwt:
+            return (None, None)
+        parsed = await aparse_jwt(jwt)
+        if not self.check_exp(parsed):
+            return (None, None)
+        user = await aget_or_create_user(parsed)
+        return (user, parsed)
+
+    async def aauthenticate(self, request: HttpRequest):
+        return await self.aauthenticate_token(get_jwt_token_from_dict(request.META))
+
+
+class JWTAuthMiddleware:
+    """
+    channels / ASGI 용 인증 미들웨어
+    Authorization: Bearer 헤더나 ?token= 쿼리스트링의 토큰으로
+    scope["user"], scope["auth"] 를 채웁니다.
+        application = JWTAuthMiddleware(URLRouter(...))
+    """
+
+    authentication_class = InternalJWTAuthentication
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def get_token(self, scope) -> Optional[str]:
+        from urllib.parse import parse_qs
+
+        headers = dict(scope.get("headers") or [])
+        authorization = headers.get(b"authorization", b"").decode()
+        token = get_jwt_token_from_dict({"HTTP_AUTHORIZATION": authorization})
+        if token:
+            return token
+        query = parse_qs(scope.get("query_string", b"").decode())
+        return query.get("token", [None])[0]
+
+    async def __call__(self, scope, receive, send):
+        from django.contrib.auth.models import AnonymousUser
+
+        scope = dict(scope)
+        try:
+            user, auth = await self.authentication_class().aauthenticate_token(
+                self.get_token(scope)
+            )
+        except exceptions.APIException:
+            user, auth = None, None
+        scope["user"] = user or AnonymousUser()
+        scope["auth"] = auth
+        return await self.inner(scope, receive, send)
@@ -1,5 +1,21 @@
+import copy
+import datetime
 import functools
+import hashlib
+import json
+import math
+import os
+import pickle
+import random
+import zlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pprint
+from urllib.parse import quote
+from uuid import uuid4
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -17,13 +33,26 @@ from typing import (
     Iterable,
     Type,
 )
+import redis.asyncio as aioredis
+from django_redis import get_redis_connection
 from django_redis.cache import RedisCache
+from django.apps import apps
+from django.conf import settings
 from django.core.cache import BaseCache, cache as _cache
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from asgiref.sync import sync_to_async
 
 from rest_framework.utils.serializer_helpers import ReturnDict
 
 from common_module.authentications import Token
+from common_module.metrics import add_payload_bytes, instrument, mark_hit
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
 
 if TYPE_CHECKING:
     from common_module.models import CommonModel
@@ -38,6 +67,8 @@ def cache_wrapper(func: Callable[..., Any]):
         def delete_many(self, lookups: Iterable[str]) -> None:
             ...
 
+        client: Any
+
     def helper(*args, **kwargs) -> CacheOverride:
         return func(*args, **kwargs)
 
@@ -60,114 +91,1264 @@ class QueryBase(Protocol):
 T = TypeVar("T", bound=QueryBase)
 LT = TypeVar("LT", bound=List[QueryBase])
 
+MISSING = object()
+
+# 다른 워커의 L1 캐시를 비우기 위한 pub/sub 채널
+INVALIDATION_CHANNEL = "common_module:l1:invalidate"
+# 자신이 보낸 무효화 메시지를 구분하기 위한 식별자 (호스트 구분용)
+_sender_token = uuid4().hex
+_local_caches: List["LocalCache"] = []
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+# 무효화된 세대의 키를 지우는 워커
+_sweep_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-sweep")
+
+
+class LocalCache:
+    """
+    redis 앞단에 두는 프로세스 내 LRU 캐시 (L1)
+    반환값은 워커 안에서 공유되므로 꺼낸 객체를 수정하면 안됩니다.
+    """
+
+    def __init__(self, maxsize: int = 1024, timeout: float = 60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.l2_hits = 0
+        self.l2_misses = 0
+        _local_caches.append(self)
+
+    def get(self, key: str) -> Any:
+        # 없거나 만료되었으면 MISSING 을 반환합니다
+        start_invalidation_listener()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.l1_misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.l1_hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = None):
+        start_invalidation_listener()
+        expires = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def record_l2(self, hit: bool):
+        if hit:
+            self.l2_hits += 1
+        else:
+            self.l2_misses += 1
+
+    def stats(self):
+        l1_total = self.l1_hits + self.l1_misses
+        l2_total = self.l2_hits + self.l2_misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "l1_hits": self.l1_hits,
+            "l1_misses": self.l1_misses,
+            "l1_hit_ratio": self.l1_hits / l1_total if l1_total else 0.0,
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            "l2_hit_ratio": self.l2_hits / l2_total if l2_total else 0.0,
+        }
+
+
+_async_clients: "weakref.WeakKeyDictionary[Any, aioredis.Redis]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _async_pool_kwargs() -> dict:
+    # sync 쪽 django_redis OPTIONS 와 같은 접속 설정을 씁니다
+    options = settings.CACHES["default"].get("OPTIONS", {})
+    kwargs = dict(options.get("CONNECTION_POOL_KWARGS", {}))
+    if options.get("PASSWORD"):
+        kwargs["password"] = options["PASSWORD"]
+    if "SOCKET_TIMEOUT" in options:
+        kwargs["socket_timeout"] = options["SOCKET_TIMEOUT"]
+    if "SOCKET_CONNECT_TIMEOUT" in options:
+        kwargs["socket_connect_timeout"] = options["SOCKET_CONNECT_TIMEOUT"]
+    return kwargs
+
+
+def get_async_redis_connection() -> "aioredis.Redis":
+    # 이벤트 루프마다 하나의 커넥션 풀을 공유합니다 (sync 쪽과 같은 redis 사용)
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        # async_to_sync 처럼 호출마다 루프를 새로 만들고 닫는 경우의 풀은 버립니다
+        for closed in [x for x in list(_async_clients.keys()) if x.is_closed()]:
+            _async_clients.pop(closed, None)
+        location = settings.CACHES["default"]["LOCATION"]
+        if isinstance(location, (list, tuple)):
+            location = location[0]
+        client = _async_clients[loop] = aioredis.Redis(
+            connection_pool=aioredis.ConnectionPool.from_url(
+                location, **_async_pool_kwargs()
+            )
+        )
+    return client
+
+
+def _sender_id() -> str:
+    # import 후 fork 하는 경우 (gunicorn --preload) 워커끼리 구분되도록 pid 를 붙입니다
+    return f"{_sender_token}.{os.getpid()}"
+
+
+def publish_invalidation(key: str, pipe=None):
+    # 다른 워커들의 L1 캐시에서 해당 키를 지우도록 알립니다
+    client = pipe if pipe is not None else get_redis_connection("default")
+    client.publish(INVALIDATION_CHANNEL, f"{_sender_id()}|{key}")
+
+
+def _drop_local(key: str):
+    for local in _local_caches:
+        local.delete(key)
+
+
+def _listen_invalidations():
+    while True:
+        try:
+            pubsub = get_redis_connection("default").pubsub(
+                ignore_subscribe_messages=True
+            )
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            sender_id = _sender_id()
+            for message in pubsub.listen():
+                sender, _, key = message["data"].decode().partition("|")
+                if sender != sender_id:
+                    _drop_local(key)
+        except Exception:
+            # 연결이 끊긴 동안의 메시지는 놓쳤을 수 있으므로 전부 비웁니다
+            for local in _local_caches:
+                local.clear()
+            time.sleep(1)
+
+
+def start_invalidation_listener():
+    # fork 이후 워커마다 한번씩 구독 쓰레드를 띄웁니다
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+        threading.Thread(target=_listen_invalidations, daemon=True).start()
+
+
+class PickleCodec:
+    """
+    캐시 값 직렬화 기본 코덱
+    """
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class ModelTupleCodec(PickleCodec):
+    """
+    모델 인스턴스를 (모델 라벨, concrete field 값 튜플) 로 저장합니다.
+    _state 나 prefetch 된 관계는 저장하지 않으며 Model.from_db 로 복원합니다.
+    모델이 아닌 값은 그대로 저장합니다.
+    """
+
+    def pack(self, value: Any) -> Any:
+        if isinstance(value, models.Model):
+            fields = value._meta.concrete_fields
+            return ("m", value._meta.label, [getattr(value, f.attname) for f in fields])
+        if isinstance(value, models.QuerySet):
+            value = list(value)
+        if isinstance(value, (list, tuple)) and any(
+            isinstance(v, models.Model) for v in value
+        ):
+            return ("l", [self.pack(v) for v in value])
+        return ("v", value)
+
+    def unpack(self, packed: Any) -> Any:
+        tag, *rest = packed
+        if tag == "m":
+            label, values = rest
+            model = apps.get_model(label)
+            fields = model._meta.concrete_fields
+            if len(fields) != len(values):
+                # 스키마가 바뀐 뒤의 값은 캐시 미스로 취급합니다
+                raise ValueError(f"stale cache entry for {label}")
+            return model.from_db(
+                None,
+                [f.attname for f in fields],
+                [self.to_python(f, v) for f, v in zip(fields, values)],
+            )
+        if tag == "l":
+            return [self.unpack(v) for v in rest[0]]
+        return rest[0]
+
+    def to_python(self, field: models.Field, value: Any):
+        return value
+
+    def dumps(self, value: Any) -> bytes:
+        return super().dumps(self.pack(value))
+
+    def loads(self, data: bytes) -> Any:
+        return self.unpack(super().loads(data))
+
+
+class ModelJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder 는 datetime/time 을 밀리초까지만 씁니다.
+    캐시에서 꺼낸 값이 DB 값과 같도록 isoformat() 을 그대로 씁니다.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class JSONModelCodec(ModelTupleCodec):
+    """
+    ModelTupleCodec 과 같은 구조를 JSON 으로 저장합니다.
+    필드 값은 field.to_python 으로 복원합니다.
+    """
+
+    def to_python(self, field: models.Field, value: Any):
+        if value is None:
+            return None
+        return field.to_python(value)
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(
+            self.pack(value), cls=ModelJSONEncoder, separators=(",", ":")
+        ).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return self.unpack(json.loads(data))
+
+
+class MsgpackModelCodec(JSONModelCodec):
+    """
+    JSONModelCodec 의 msgpack 버전 (msgpack 설치 필요)
+    """
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("MsgpackModelCodec 을 쓰려면 msgpack 을 설치해야 합니다")
+
+    def dumps(self, value: Any) -> bytes:
+        encoder = ModelJSONEncoder()
+        return msgpack.packb(self.pack(value), default=encoder.default)
+
+    def loads(self, data: bytes) -> Any:
+        return self.unpack(msgpack.unpackb(data))
+
+
+# 키 형식이 바뀌면 올립니다
+KEY_VERSION = "v2"
+
+# 논리 키 하나가 쓸 수 있는 redis 키 접미사 (값, get_or_compute 메타, 해시 컬렉션)
+STORAGE_SUFFIXES = ("", ":meta", ":items", ":order")
+
 
 class CacheBase:
+    # 설정하면 redis 앞에 프로세스 내 L1 캐시를 둡니다
+    local: Optional[LocalCache] = None
+    # None 이면 django_redis 의 직렬화 방식을 그대로 씁니다
+    codec: Optional[PickleCodec] = None
+    # 코덱 사용시 이 크기(bytes) 이상이면 zlib 으로 압축합니다
+    compress_threshold = 1024
+    # 키의 kwargs 부분이 이보다 길면 고정 길이 해시로 바꿉니다
+    max_payload_length = 128
+    # 켜두면 새 키에서 못 찾았을때 이전 형식의 키를 찾아 옮깁니다
+    migrate_legacy_keys = False
+    # 키 인덱스 set 의 TTL (초). 가장 긴 캐시 TTL 보다 길어야 합니다
+    index_timeout = int(os.getenv("CACHE_INDEX_TIMEOUT", "86400"))
+    # timeout=None 으로 저장한 값의 TTL. 무효화된 세대의 키가 영원히 남지 않도록 합니다
+    default_timeout = int(os.getenv("CACHE_DEFAULT_TIMEOUT", str(index_timeout)))
+
     def __init__(self, user_id: int, model_name: str):
         self.user_id = user_id
         self.model_name = model_name
-        self.global_key = f"0/{model_name}/global"
+        # 세대 번호가 바뀌면 이전 세대의 키는 더이상 조회되지 않습니다
+        self.model_generation_key = f"0/{model_name}/generation"
+        self.user_generation_key = f"{user_id}/{model_name}/generation"
+        # 이번 연산에서 마지막으로 읽은 세대 (같은 연산의 인덱스 키에 씁니다)
+        self._generation: Optional[tuple[int, int]] = None
 
-    def add_global_keys(self, key: str) -> List[str]:
-        # 글로벌 키스토어에 키 추가
-        keys = self.get_global_keys()
-        keys.append(key)
-        listed = list(set(keys))
-        cache.set(self.global_key, listed)
+    @property
+    def client(self):
+        # SADD/SREM/SMEMBERS 처럼 캐시 API 에 없는 명령용 raw 클라이언트
+        return get_redis_connection("default")
 
-        return listed
+    @property
+    def aclient(self):
+        # redis.asyncio 클라이언트 (키/값 형식은 sync 와 같습니다)
+        return get_async_redis_connection()
 
-    def get_global_keys(self):
-        # 글로벌 키스토어의 모든 키 추가
-        return cache.get(self.global_key, [])
+    @property
+    def global_key(self):
+        # 키 인덱스는 세대별 redis set 으로 관리합니다 (모델 전체 / 유저별)
+        return self.global_index_key(self.generation())
 
-    def purge_global_keys(self, key: str):
-        # 글로벌 키스토어에 해당 키 삭제
-        keys: list = self.get_global_keys()
-        try:
-            index = keys.index(key)
-            try:
-                keys.pop(index)
-                cache.set(self.global_key, list(set(keys)))
-                cache.delete(key)
-                return True
-            except:
-                return False
-        except:
+    @property
+    def user_key(self):
+        return self.user_index_key(self.generation())
+
+    def global_index_key(self, generation: tuple[int, int]):
+        return f"0/{self.model_name}/g{generation[0]}/keyset"
+
+    def user_index_key(self, generation: tuple[int, int]):
+        model_gen, user_gen = generation
+        return f"{self.user_id}/{self.model_name}/g{model_gen}.{user_gen}/keyset"
+
+    def index_keys(self):
+        # 이번 연산에서 키를 만들 때 읽은 세대의 인덱스 (key() 뒤에 부릅니다)
+        generation = self._generation or self.generation()
+        return [
+            cache.make_key(self.global_index_key(generation)),
+            cache.make_key(self.user_index_key(generation)),
+        ]
+
+    def add_global_keys(self, *keys: str, pipe=None):
+        # 글로벌/유저 키스토어에 키 추가 (SADD 라 중복, 경합 걱정 없음)
+        if not keys:
+            return
+        client = pipe if pipe is not None else self.client
+        for index_key in self.index_keys():
+            client.sadd(index_key, *keys)
+            client.expire(index_key, self.index_timeout)
+
+    def get_global_keys(self) -> List[str]:
+        # 글로벌 키스토어의 모든 키
+        return self._members(self.global_key)
+
+    def get_user_keys(self) -> List[str]:
+        # 유저 키스토어의 모든 키
+        return self._members(self.user_key)
+
+    def _members(self, index_key: str) -> List[str]:
+        members = self.client.smembers(cache.make_key(index_key))
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    def storage_keys(self, key: str) -> List[str]:
+        # 논리 키 하나가 실제로 차지하는 redis 키 목록
+        return [cache.make_key(key)]
+
+    def purge_global_keys(self, *keys: str):
+        # 키스토어에서 해당 키들 삭제 후 캐시 데이터도 한번의 round trip 으로 삭제
+        if not keys:
+            return False
+        pipe = self._purge_pipeline(self.client.pipeline(), keys)
+        removed, *_ = pipe.execute()
+        return bool(removed)
+
+    async def apurge_global_keys(self, *keys: str):
+        if not keys:
             return False
+        await self.ageneration()
+        pipe = self._purge_pipeline(self.aclient.pipeline(), keys)
+        removed, *_ = await pipe.execute()
+        return bool(removed)
+
+    def _purge_pipeline(self, pipe, keys: Iterable[str]):
+        global_key, user_key = self.index_keys()
+        pipe.srem(global_key, *keys)
+        pipe.srem(user_key, *keys)
+        pipe.delete(*[k for key in keys for k in self.storage_keys(key)])
+        if self.local:
+            for key in keys:
+                self.local.delete(key)
+                publish_invalidation(key, pipe)
+        return pipe
+
+    def generation(self) -> tuple[int, int]:
+        # (모델 세대, 유저 세대) 다른 워커의 무효화를 놓치지 않도록 연산마다 읽습니다
+        # L1 이 있으면 pub/sub 로 비워지는 L1 에서 읽으므로 round trip 이 없습니다
+        if not self._local_generation():
+            values = self.client.mget(*self._generation_keys())
+            self._store_generation(values)
+        return self._generation  # type:ignore
+
+    async def ageneration(self) -> tuple[int, int]:
+        if not self._local_generation():
+            values = await self.aclient.mget(*self._generation_keys())
+            self._store_generation(values)
+        return self._generation  # type:ignore
+
+    def _generation_keys(self):
+        return [
+            cache.make_key(self.model_generation_key),
+            cache.make_key(self.user_generation_key),
+        ]
+
+    def _local_generation(self) -> bool:
+        if not self.local:
+            return False
+        model_gen = self.local.get(self.model_generation_key)
+        user_gen = self.local.get(self.user_generation_key)
+        if model_gen is MISSING or user_gen is MISSING:
+            return False
+        self._generation = (model_gen, user_gen)
+        return True
+
+    def _store_generation(self, values: List[Any]):
+        model_gen, user_gen = (int(v) if v else 0 for v in values)
+        self._generation = (model_gen, user_gen)
+        if self.local:
+            self.local.set(self.model_generation_key, model_gen)
+            self.local.set(self.user_generation_key, user_gen)
+
+    @instrument("invalidate")
+    def invalidate_model(self):
+        # 모델 세대를 올려 모든 유저의 캐시를 무효화합니다
+        # 이전 세대의 키는 모델 인덱스를 SSCAN 하면서 백그라운드에서 지웁니다
+        # 다른 유저들의 이전 세대 인덱스 set 은 index_timeout 으로 만료됩니다
+        self._generation = None
+        global_key, user_key = self.index_keys()
+        pipe = self.client.pipeline()
+        pipe.incr(cache.make_key(self.model_generation_key))
+        if self.local:
+            self.local.delete(self.model_generation_key)
+            publish_invalidation(self.model_generation_key, pipe)
+        pipe.unlink(user_key)
+        model_gen, *_ = pipe.execute()
+        _sweep_executor.submit(self.sweep_index, global_key)
+        return model_gen
+
+    @instrument("invalidate")
+    def invalidate_user(self):
+        # 유저 세대를 올려 해당 유저의 캐시만 무효화합니다
+        self._generation = None
+        global_key, user_key = self.index_keys()
+        # 이전 세대 키는 값과 함께 모델 인덱스에서도 지웁니다
+        members = self.client.smembers(user_key)
+        pipe = self.client.pipeline()
+        pipe.incr(cache.make_key(self.user_generation_key))
+        if self.local:
+            self.local.delete(self.user_generation_key)
+            publish_invalidation(self.user_generation_key, pipe)
+        if members:
+            pipe.srem(global_key, *members)
+        pipe.unlink(user_key)
+        user_gen, *_ = pipe.execute()
+        self._unlink_members(members)
+        return user_gen
+
+    def sweep_index(self, index_key: str, batch: int = 500):
+        # 더 이상 조회되지 않는 세대의 인덱스 set 과 그 키들을 나눠서 지웁니다
+        members = []
+        for member in self.client.sscan_iter(index_key, count=batch):
+            members.append(member)
+            if len(members) >= batch:
+                self._unlink_members(members)
+                members = []
+        self._unlink_members(members)
+        self.client.unlink(index_key)
+
+    def _unlink_members(self, members: Iterable[Any]):
+        # 인덱스는 모델 이름 단위라 단일/컬렉션 캐시 키가 섞여 있습니다
+        keys = [m.decode() if isinstance(m, bytes) else m for m in members]
+        storage_keys = [
+            cache.make_key(f"{key}{suffix}")
+            for key in keys
+            for suffix in STORAGE_SUFFIXES
+        ]
+        if storage_keys:
+            self.client.unlink(*storage_keys)
 
     def key(self, kwargs: dict):
-        _dict = {}
-        translated: List[str] = []
-        for k, v in kwargs.items():
+        return self.build_key(kwargs, self.generation())
+
+    def keys_for(self, kwargs_list: Iterable[dict]) -> List[str]:
+        # 여러 키를 만들 때는 세대를 한번만 읽습니다
+        generation = self.generation()
+        return [self.build_key(kwargs, generation) for kwargs in kwargs_list]
+
+    async def akey(self, kwargs: dict):
+        return self.build_key(kwargs, await self.ageneration())
+
+    def build_key(self, kwargs: dict, generation: tuple[int, int]):
+        # kwargs 순서와 무관하게 같은 키를 만듭니다
+        # 값에는 타입 태그를 붙이고 구분자를 이스케이프 해서 충돌을 막습니다
+        translated = [
+            f"{quote(k, safe='')}={self.tag(v)}" for k, v in sorted(kwargs.items())
+        ]
+        payload = "&".join(translated)
+        if len(payload) > self.max_payload_length:
+            digest = hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+            payload = f"h:{digest}"
+        model_gen, user_gen = generation
+        namespace = f"{self.user_id}:{self.model_name}:g{model_gen}.{user_gen}"
+        return f"{namespace}:{KEY_VERSION}:{payload}"
+
+    def tag(self, value: Any) -> str:
+        if value is None:
+            return "n:"
+        if isinstance(value, bool):
+            return f"b:{int(value)}"
+        if isinstance(value, int):
+            return f"i:{value}"
+        if isinstance(value, float):
+            return f"f:{value!r}"
+        if isinstance(value, str):
+            return f"s:{quote(value, safe='')}"
+        if isinstance(value, models.Model):
+            return f"m:{quote(value._meta.label_lower, safe='')}.{value.pk}"
+        if isinstance(value, Mapping):
+            pairs = sorted(f"{self.tag(k)}={self.tag(v)}" for k, v in value.items())
+            return f"d:{quote(','.join(pairs), safe='')}"
+        if isinstance(value, (list, tuple, set, frozenset)):
+            items = [self.tag(v) for v in value]
+            if not isinstance(value, (list, tuple)):
+                items.sort()
+            return f"l:{quote(','.join(items), safe='')}"
+        return f"{type(value).__name__}:{quote(str(value), safe='')}"
+
+    def legacy_key(self, kwargs: dict):
+        # 이전 형식의 키 (kwargs 순서대로 구분자 없이 이어붙임)
+        translated = "".join(f"{k}={v}" for k, v in kwargs.items())
+        return f"{self.user_id}:{self.model_name}:{translated}"
+
+    def migrate_legacy(self, key: str, kwargs: dict) -> Any:
+        # 이전 형식의 키에 값이 있으면 남은 TTL 그대로 새 키로 옮깁니다
+        legacy = self.legacy_key(kwargs)
+        value = cache.get(legacy)
+        if value is None:
+            return None
+        ttl = cache.ttl(legacy)
+        self._set(key, value, ttl or None)
+        cache.delete(legacy)
+        return value
+
+    def purge_legacy_keys(self):
+        # 이전 형식의 글로벌 키 리스트에 있던 키들을 모두 지웁니다
+        legacy_global_key = f"0/{self.model_name}/global"
+        keys = cache.get(legacy_global_key, [])
+        cache.delete_many([*keys, legacy_global_key])
+        return len(keys)
+
+    def encode(self, value: Any):
+        if self.codec is None:
+            return cache.client.encode(value)
+        data = self.codec.dumps(value)
+        if len(data) >= self.compress_threshold:
+            return b"z" + zlib.compress(data)
+        return b"r" + data
+
+    def decode(self, value: Any):
+        if self.codec is None:
+            return cache.client.decode(value)
+        data = value[1:]
+        if value[:1] == b"z":
+            data = zlib.decompress(data)
+        return self.codec.loads(data)
+
+    def _get(self, key: str) -> Any:
+        return self._get_many([key]).get(key)
+
+    def _get_many(self, keys: List[str]) -> dict[str, Any]:
+        # 찾은 키만 담아 반환합니다 (cache.get_many 와 같음)
+        if not keys:
+            return {}
+        values = self.client.mget([cache.make_key(key) for key in keys])
+        return self._decode_found(keys, values)
+
+    async def _aget(self, key: str) -> Any:
+        return (await self._aget_many([key])).get(key)
+
+    async def _aget_many(self, keys: List[str]) -> dict[str, Any]:
+        if not keys:
+            return {}
+        values = await self.aclient.mget([cache.make_key(key) for key in keys])
+        return self._decode_found(keys, values)
+
+    def _decode_found(self, keys: List[str], values: List[Any]) -> dict[str, Any]:
+        found = {}
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+            add_payload_bytes(len(value) if isinstance(value, bytes) else 0)
             try:
-                _dict[k] = str(v)
-                translated.append(f"{k}={str(v)}")
-            except:
-                _dict[k] = v
-        key = f"{self.user_id}:{self.model_name}:{''.join(translated)}"
+                found[key] = self.decode(value)
+            except Exception:
+                # 코덱이 바뀌었거나 깨진 값은 미스로 취급합니다
+                continue
+        return found
+
+    def _set(self, key: str, value: Any, timeout: Optional[int] = None):
+        self._set_many({key: value}, timeout)
 
-        # if len(key.split("-")) >= 4:
-        #     raise Exception
-        return key
+    def _set_many(self, values: Mapping[str, Any], timeout: Optional[int] = None):
+        # 값 저장과 인덱스 등록을 한번의 round trip 으로 처리합니다
+        if not values:
+            return
+        self._set_pipeline(self.client.pipeline(), values, timeout).execute()
+        self._set_local(values, timeout)
 
+    async def _aset(self, key: str, value: Any, timeout: Optional[int] = None):
+        await self._aset_many({key: value}, timeout)
+
+    async def _aset_many(
+        self, values: Mapping[str, Any], timeout: Optional[int] = None
+    ):
+        if not values:
+            return
+        await self._set_pipeline(self.aclient.pipeline(), values, timeout).execute()
+        self._set_local(values, timeout)
+
+    def _set_pipeline(self, pipe, values: Mapping[str, Any], timeout: Optional[int]):
+        expired = timeout is not None and timeout <= 0
+        timeout = timeout or self.default_timeout
+        for key, value in values.items():
+            if expired:
+                pipe.delete(cache.make_key(key))
+            else:
+                encoded = self.encode(value)
+                add_payload_bytes(len(encoded) if isinstance(encoded, bytes) else 0)
+                pipe.set(cache.make_key(key), encoded, ex=timeout)
+        if not expired:
+            self.add_global_keys(*values.keys(), pipe=pipe)
+        if self.local:
+            for key in values.keys():
+                self.local.delete(key)
+                publish_invalidation(key, pipe)
+        return pipe
+
+    def _set_local(self, values: Mapping[str, Any], timeout: Optional[int]):
+        if self.local and (timeout is None or timeout > 0):
+            local_timeout = min(timeout or self.local.timeout, self.local.timeout)
+            for key, value in values.items():
+                self.local.set(key, value, local_timeout)
+
+    @instrument("purge")
     def purge(self, **kwargs):
         # 캐시된 데이터를 지웁니다
-        key = self.key(**kwargs)
+        key = self.key(kwargs)
         self.purge_global_keys(key)
-        cache.delete(key)
+
+    @instrument("purge")
+    async def apurge(self, **kwargs):
+        key = await self.akey(kwargs)
+        await self.apurge_global_keys(key)
+
+    @instrument("purge_many")
+    def purge_many(self, kwargs_list: Iterable[dict]):
+        # 여러 캐시 데이터를 한번에 지웁니다
+        return self.purge_global_keys(*self.keys_for(kwargs_list))
+
+
+# 자신이 잡은 락일 때만 해제합니다
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
 
 
 class UseSingleCache(CacheBase, Generic[T]):
+    def storage_keys(self, key: str) -> List[str]:
+        # get_or_compute 의 메타데이터(계산시간, 만료시각)도 함께 지웁니다
+        return [cache.make_key(key), cache.make_key(f"{key}:meta")]
+
+    @instrument("get")
     def get(self, **kwargs) -> Optional[T]:
         key = self.key(kwargs)
-        self.add_global_keys(key)
-        return cache.get(key, None)
+        if self.local:
+            value = self.local.get(key)
+            if value is not MISSING:
+                return value
+        value = self._get(key)
+        if value is None and self.migrate_legacy_keys:
+            value = self.migrate_legacy(key, kwargs)
+        return self._fill_local(key, value)
+
+    @instrument("get")
+    async def aget(self, **kwargs) -> Optional[T]:
+        key = await self.akey(kwargs)
+        if self.local:
+            value = self.local.get(key)
+            if value is not MISSING:
+                return value
+        value = await self._aget(key)
+        if value is None and self.migrate_legacy_keys:
+            value = await sync_to_async(self.migrate_legacy)(key, kwargs)
+        return self._fill_local(key, value)
+
+    def _fill_local(self, key: str, value: Any):
+        if self.local:
+            self.local.record_l2(value is not None)
+            if value is not None:
+                self.local.set(key, value)
+        return value
 
+    @instrument("get_many")
+    def get_many(self, kwargs_list: Iterable[dict]) -> List[Optional[T]]:
+        # 여러 키를 MGET 한번으로 조회합니다. 결과는 kwargs_list 순서를 따릅니다
+        keys = self.keys_for(kwargs_list)
+        found: dict[str, Any] = {}
+        missed = keys
+        if self.local:
+            missed = []
+            for key in keys:
+                value = self.local.get(key)
+                if value is MISSING:
+                    missed.append(key)
+                else:
+                    found[key] = value
+        if missed:
+            fetched = self._get_many(missed)
+            found.update(fetched)
+            if self.local:
+                for key in missed:
+                    self.local.record_l2(key in fetched)
+                for key, value in fetched.items():
+                    self.local.set(key, value)
+        return [found.get(key) for key in keys]
+
+    @instrument("set")
     def set(self, value: T, timeout: Optional[int] = None, **kwargs) -> T:
         # 모든 캐시 데이터를 오버라이드합니다
         key = self.key(kwargs)
-        self.add_global_keys(key)
-        cache.set(key, value=value, timeout=timeout)
+        self._set(key, value, timeout)
         return value
 
+    def write_through(self, entries: Iterable[tuple[dict, T]]) -> None:
+        # 이미 캐시된 키만 TTL 을 유지한 채 새 값으로 덮어씁니다
+        entries = list(entries)
+        keys = self.keys_for(kwargs for kwargs, _ in entries)
+        pipe = self.client.pipeline(transaction=False)
+        for key, (_, value) in zip(keys, entries):
+            pipe.set(cache.make_key(key), self.encode(value), xx=True, keepttl=True)
+            if self.local:
+                self.local.delete(key)
+                publish_invalidation(key, pipe)
+        pipe.execute()
+
+    @instrument("set")
+    async def aset(self, value: T, timeout: Optional[int] = None, **kwargs) -> T:
+        key = await self.akey(kwargs)
+        await self._aset(key, value, timeout)
+        return value
+
+    @instrument("set_many")
+    def set_many(
+        self, entries: Iterable[tuple[dict, T]], timeout: Optional[int] = None
+    ) -> None:
+        # (kwargs, value) 목록을 하나의 파이프라인으로 저장합니다
+        entries = list(entries)
+        keys = self.keys_for(kwargs for kwargs, _ in entries)
+        self._set_many(dict(zip(keys, (value for _, value in entries))), timeout)
+
+    @instrument("get_or_compute")
+    def get_or_compute(
+        self,
+        loader: Callable[[], T],
+        timeout: Optional[int] = None,
+        lock_timeout: int = 10,
+        wait: float = 2.0,
+        beta: float = 1.0,
+        **kwargs,
+    ) -> T:
+        """
+        캐시에 없으면 loader 로 계산해서 저장합니다.
+        한 워커만 락을 잡고 다시 계산하며, 나머지는 잠시 기다리거나 이전 값을 씁니다.
+        timeout 이 있으면 XFetch 방식으로 만료 전에 확률적으로 미리 갱신합니다.
+        None 은 캐시되지 않으므로 loader 는 None 을 반환하지 않아야 합니다.
+        """
+        key = self.key(kwargs)
+        meta_key = f"{key}:meta"
+        if self.local:
+            value = self.local.get(key)
+            if value is not MISSING:
+                return value
+        values = self._get_many([key, meta_key])
+        value = values.get(key)
+        if self.local:
+            self.local.record_l2(value is not None)
+
+        if value is not None:
+            if not self._should_refresh(values.get(meta_key), beta):
+                if self.local:
+                    self.local.set(key, value)
+                return value
+            # 다른 워커가 갱신중이면 이전 값을 그대로 씁니다
+            lock = self._acquire_lock(key, lock_timeout)
+            if not lock:
+                return value
+            return self._compute(key, loader, timeout, lock)
+
+        lock = self._acquire_lock(key, lock_timeout)
+        if not lock:
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = self._get(key)
+                if value is not None:
+                    return value
+        return self._compute(key, loader, timeout, lock)
+
+    def _should_refresh(self, meta: Optional[tuple[float, float]], beta: float):
+        if not meta:
+            return False
+        delta, expiry = meta
+        return time.time() - delta * beta * math.log(random.random()) >= expiry
+
+    def _acquire_lock(self, key: str, lock_timeout: int) -> Optional[str]:
+        token = uuid4().hex
+        lock_key = cache.make_key(f"{key}:lock")
+        if self.client.set(lock_key, token, nx=True, ex=lock_timeout):
+            return token
+        return None
+
+    def _compute(
+        self,
+        key: str,
+        loader: Callable[[], T],
+        timeout: Optional[int],
+        lock: Optional[str],
+    ) -> T:
+        mark_hit(False)
+        try:
+            start = time.monotonic()
+            value = loader()
+            delta = time.monotonic() - start
+            self._set(key, value, timeout)
+            if timeout:
+                meta = (delta, time.time() + timeout)
+                self.client.set(
+                    cache.make_key(f"{key}:meta"), self.encode(meta), ex=timeout
+                )
+            return value
+        finally:
+            if lock:
+                release = self.client.register_script(RELEASE_LOCK_SCRIPT)
+                release(keys=[cache.make_key(f"{key}:lock")], args=[lock])
+
 
 class UseIterCache(UseSingleCache, Generic[T]):
+    @property
+    def collection_key(self):
+        # write-through 에서 지울 이 유저/모델의 리스트 키 목록
+        return f"{self.user_id}/{self.model_name}/lists"
+
     def get(self, **kwargs) -> Optional[Iterable[T]]:
-        key = self.key(kwargs)
-        self.add_global_keys(key)
-        return cache.get(key, None)
+        return super().get(**kwargs)
 
     def set(
         self, value: Iterable[T], timeout: Optional[int] = None, **kwargs
     ) -> Iterable[T]:
         # 모든 캐시 데이터를 오버라이드합니다
-        key = self.key(kwargs)
-        self.add_global_keys(key)
-        cache.set(key, value=value, timeout=timeout)
-        return value
+        return super().set(value, timeout, **kwargs)
 
+    @instrument("update")
     def update(self, model: T, **kwargs):
         # 캐시된 데이터에서 특정 데이터를 업데이트합니다
         qs = self.get(**kwargs)
         qs_list: List[T] = []
         if qs:
-            for q in qs:
-                if q.pk == model.pk:  # type:ignore
-                    qs_list.append(model)
-                else:
-                    qs_list.append(q)
+            qs_list = self._replaced(qs, model)
             self.set(qs_list, **kwargs)
         return qs_list
 
+    @instrument("update")
+    async def aupdate(self, model: T, **kwargs):
+        qs = await self.aget(**kwargs)
+        qs_list: List[T] = []
+        if qs:
+            qs_list = self._replaced(qs, model)
+            await self.aset(qs_list, **kwargs)
+        return qs_list
+
+    def _replaced(self, qs: Iterable[T], model: T) -> List[T]:
+        return [model if q.pk == model.pk else q for q in qs]
+
+    @instrument("pop")
     def pop(self, id: int, **kwargs):
         # 캐시된 데이터 내에서 특정 데이터를 지웁니다
         qs = self.get(**kwargs)
-        qs_list: Iterable[T] = []
+        qs_list: List[T] = []
         if qs:
-            for q in qs:
-                if q.pk == id:  # type:ignore
-                    pass
-                else:
-                    qs_list.append(q)
+            qs_list = self._without(qs, id)
             self.set(qs_list, **kwargs)
         return qs_list
+
+    @instrument("pop")
+    async def apop(self, id: int, **kwargs):
+        qs = await self.aget(**kwargs)
+        qs_list: List[T] = []
+        if qs:
+            qs_list = self._without(qs, id)
+            await self.aset(qs_list, **kwargs)
+        return qs_list
+
+    def _without(self, qs: Iterable[T], id: int) -> List[T]:
+        return [q for q in qs if q.pk != id]
+
+    def _set_pipeline(self, pipe, values: Mapping[str, Any], timeout: Optional[int]):
+        pipe = super()._set_pipeline(pipe, values, timeout)
+        if values and (timeout is None or timeout > 0):
+            pipe.sadd(cache.make_key(self.collection_key), *values.keys())
+            pipe.expire(cache.make_key(self.collection_key), self.index_timeout)
+        return pipe
+
+    def purge_collections(self) -> None:
+        # 리스트는 통째로 직렬화되어 있어서 바뀐 데이터가 있으면 지웁니다
+        collections = self._members(self.collection_key)
+        if not collections:
+            return
+        self.generation()
+        pipe = self._purge_pipeline(self.client.pipeline(), collections)
+        pipe.srem(cache.make_key(self.collection_key), *collections)
+        pipe.execute()
+
+
+# 해시 필드가 있을 때만 덮어씁니다
+HASH_UPDATE_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# 캐시된 컬렉션이 있을 때만 추가합니다. 순서값이 없으면 맨 뒤에 붙입니다
+HASH_INSERT_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[3]) == 0 then
+    return 0
+end
+local score = ARGV[4]
+if score == '' then
+    local last = redis.call('ZREVRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+    if last[2] then
+        score = tonumber(last[2]) + 1
+    else
+        score = 0
+    end
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], score, ARGV[1])
+return 1
+"""
+
+
+class UseHashIterCache(CacheBase, Generic[T]):
+    """
+    컬렉션을 redis hash(pk -> 직렬화된 데이터) + sorted set(순서) 로 저장합니다.
+    update/pop/insert 가 전체 리스트를 다시 쓰지 않고 한 항목만 서버에서 수정합니다.
+    """
+
+    # 빈 컬렉션도 캐시된 것으로 구분하기 위한 필드
+    META_FIELD = "__meta__"
+
+    def storage_keys(self, key: str) -> List[str]:
+        return [cache.make_key(f"{key}:items"), cache.make_key(f"{key}:order")]
+
+    @property
+    def collection_key(self):
+        # write-through 대상이 되는 이 유저/모델의 컬렉션 키 목록
+        return f"{self.user_id}/{self.model_name}/collections"
+
+    @instrument("get")
+    def get(self, **kwargs) -> Optional[List[T]]:
+        pipe = self.client.pipeline(transaction=False)
+        items, order = self._get_pipeline(pipe, self.key(kwargs)).execute()
+        return self._rebuild(items, order)
+
+    @instrument("get")
+    async def aget(self, **kwargs) -> Optional[List[T]]:
+        pipe = self.aclient.pipeline(transaction=False)
+        items, order = await self._get_pipeline(pipe, await self.akey(kwargs)).execute()
+        return self._rebuild(items, order)
+
+    def _get_pipeline(self, pipe, key: str):
+        items_key, order_key = self.storage_keys(key)
+        pipe.hgetall(items_key)
+        pipe.zrange(order_key, 0, -1)
+        return pipe
+
+    def _rebuild(self, items: dict, order: List[bytes]) -> Optional[List[T]]:
+        if self.META_FIELD.encode() not in items:
+            return None
+        add_payload_bytes(sum(len(v) for v in items.values()))
+        return [self.decode(items[pk]) for pk in order if pk in items]
+
+    @instrument("set")
+    def set(
+        self, value: Iterable[T], timeout: Optional[int] = None, **kwargs
+    ) -> Iterable[T]:
+        # 모든 캐시 데이터를 오버라이드합니다
+        key = self.key(kwargs)
+        self._set_pipeline(self.client.pipeline(), key, value, timeout).execute()
+        return value
+
+    @instrument("set")
+    async def aset(
+        self, value: Iterable[T], timeout: Optional[int] = None, **kwargs
+    ) -> Iterable[T]:
+        key = await self.akey(kwargs)
+        pipe = self._set_pipeline(self.aclient.pipeline(), key, value, timeout)
+        await pipe.execute()
+        return value
+
+    def _set_pipeline(self, pipe, key: str, value: Iterable[T], timeout: Optional[int]):
+        items_key, order_key = self.storage_keys(key)
+        mapping: dict[str, Any] = {self.META_FIELD: 1}
+        order: dict[str, int] = {}
+        for index, item in enumerate(value):
+            mapping[str(item.pk)] = encoded = self.encode(item)
+            order[str(item.pk)] = index
+            add_payload_bytes(len(encoded) if isinstance(encoded, bytes) else 0)
+        pipe.delete(items_key, order_key)
+        if timeout is None or timeout > 0:
+            timeout = timeout or self.default_timeout
+            pipe.hset(items_key, mapping=mapping)
+            if order:
+                pipe.zadd(order_key, order)
+            pipe.expire(items_key, timeout)
+            pipe.expire(order_key, timeout)
+            self.add_global_keys(key, pipe=pipe)
+            pipe.sadd(cache.make_key(self.collection_key), key)
+            pipe.expire(cache.make_key(self.collection_key), self.index_timeout)
+        return pipe
+
+    def write_through(self, models_: Iterable[T]) -> None:
+        # 캐시된 모든 컬렉션에서 해당 pk 항목을 새 값으로 바꿉니다 (없는 항목은 무시)
+        collections = self._members(self.collection_key)
+        if not collections:
+            return
+        encoded = [(str(model.pk), self.encode(model)) for model in models_]
+        script = self.client.register_script(HASH_UPDATE_SCRIPT)
+        pipe = self.client.pipeline(transaction=False)
+        for key in collections:
+            items_key, _ = self.storage_keys(key)
+            for pk, value in encoded:
+                script(keys=[items_key], args=[pk, value], client=pipe)
+        pipe.execute()
+
+    def remove_through(self, ids: Iterable[Any]) -> None:
+        # 캐시된 모든 컬렉션에서 해당 pk 항목을 지웁니다
+        collections = self._members(self.collection_key)
+        ids = [str(id) for id in ids]
+        if not collections or not ids:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key in collections:
+            items_key, order_key = self.storage_keys(key)
+            pipe.hdel(items_key, *ids)
+            pipe.zrem(order_key, *ids)
+        pipe.execute()
+
+    def purge_collections(self) -> None:
+        # 어떤 컬렉션에 속할지 알 수 없는 새 데이터가 생기면 컬렉션들을 지웁니다
+        collections = self._members(self.collection_key)
+        if not collections:
+            return
+        self.generation()
+        pipe = self._purge_pipeline(self.client.pipeline(), collections)
+        pipe.srem(cache.make_key(self.collection_key), *collections)
+        pipe.execute()
+
+    @instrument("update")
+    def update(self, model: T, **kwargs) -> bool:
+        # 캐시된 데이터에 해당 pk 가 있을 때만 업데이트합니다
+        items_key, _ = self.storage_keys(self.key(kwargs))
+        script = self.client.register_script(HASH_UPDATE_SCRIPT)
+        updated = script(keys=[items_key], args=[str(model.pk), self.encode(model)])
+        return bool(updated)
+
+    @instrument("update")
+    async def aupdate(self, model: T, **kwargs) -> bool:
+        items_key, _ = self.storage_keys(await self.akey(kwargs))
+        script = self.aclient.register_script(HASH_UPDATE_SCRIPT)
+        updated = await script(
+            keys=[items_key], args=[str(model.pk), self.encode(model)]
+        )
+        return bool(updated)
+
+    @instrument("insert")
+    def insert(self, model: T, score: Optional[float] = None, **kwargs) -> bool:
+        # 캐시된 컬렉션에 데이터를 추가합니다. score 가 없으면 맨 뒤에 추가됩니다
+        items_key, order_key = self.storage_keys(self.key(kwargs))
+        script = self.client.register_script(HASH_INSERT_SCRIPT)
+        inserted = script(
+            keys=[items_key, order_key],
+            args=[
+                str(model.pk),
+                self.encode(model),
+                self.META_FIELD,
+                "" if score is None else score,
+            ],
+        )
+        return bool(inserted)
+
+    @instrument("pop")
+    def pop(self, id: int, **kwargs) -> bool:
+        # 캐시된 데이터 내에서 특정 데이터를 지웁니다
+        items_key, order_key = self.storage_keys(self.key(kwargs))
+        pipe = self.client.pipeline()
+        pipe.hdel(items_key, str(id))
+        pipe.zrem(order_key, str(id))
+        removed, _ = pipe.execute()
+        return bool(removed)
+
+    @instrument("pop")
+    async def apop(self, id: int, **kwargs) -> bool:
+        items_key, order_key = self.storage_keys(await self.akey(kwargs))
+        pipe = self.aclient.pipeline()
+        pipe.hdel(items_key, str(id))
+        pipe.zrem(order_key, str(id))
+        removed, _ = await pipe.execute()
+        return bool(removed)
+
+
+class WriteThrough:
+    """
+    모델의 post_save/post_delete 에서 캐시를 갱신합니다.
+    시그널 시점의 값을 복사해두고 트랜잭션이 커밋된 뒤에 반영합니다.
+    - 이미 캐시된 pk=<pk> 단일 키는 새 값으로 덮어씁니다.
+    - UseHashIterCache 컬렉션에 있는 항목은 새 값으로 바꾸거나 지웁니다.
+    - 새로 생성된 데이터는 어느 컬렉션에 들어갈지 알 수 없으므로 컬렉션만 지웁니다.
+    - UseIterCache 리스트는 항목만 바꿀 수 없어서 저장/삭제가 있으면 지웁니다.
+    대상 유저는 데이터의 소유자와 공용 캐시(user_id=0) 입니다.
+    """
+
+    def __init__(
+        self,
+        model: Type[models.Model],
+        model_name: Optional[str] = None,
+        user_field: str = "user_id",
+        single_cache: Type[UseSingleCache] = UseSingleCache,
+        collection_cache: Type[UseHashIterCache] = UseHashIterCache,
+        list_cache: Type[UseIterCache] = UseIterCache,
+    ):
+        self.model = model
+        self.model_name = model_name or model.__name__.lower()
+        self.user_field = user_field
+        self.single_cache = single_cache
+        self.collection_cache = collection_cache
+        self.list_cache = list_cache
+
+    def user_ids(self, instance: models.Model) -> set[int]:
+        return {getattr(instance, self.user_field, 0) or 0, 0}
+
+    def group(self, instances: Iterable[models.Model]):
+        grouped: dict[int, List[models.Model]] = {}
+        for instance in instances:
+            for user_id in self.user_ids(instance):
+                grouped.setdefault(user_id, []).append(instance)
+        return grouped.items()
+
+    def saved(self, instances: Iterable[models.Model], created: bool = False):
+        for user_id, group in self.group(instances):
+            single = self.single_cache(user_id, self.model_name)
+            single.write_through([({"pk": obj.pk}, obj) for obj in group])
+            collections = self.collection_cache(user_id, self.model_name)
+            if created:
+                collections.purge_collections()
+            else:
+                collections.write_through(group)
+            self.list_cache(user_id, self.model_name).purge_collections()
+
+    def deleted(self, instances: Iterable[models.Model]):
+        for user_id, group in self.group(instances):
+            single = self.single_cache(user_id, self.model_name)
+            single.purge_many([{"pk": obj.pk} for obj in group])
+            collections = self.collection_cache(user_id, self.model_name)
+            collections.remove_through([obj.pk for obj in group])
+            self.list_cache(user_id, self.model_name).purge_collections()
+
+    def defer_saved(
+        self,
+        instances: Iterable[models.Model],
+        created: bool = False,
+        using: Optional[str] = None,
+    ):
+        # 롤백되면 캐시에도 반영되지 않도록 커밋 이후로 미룹니다
+        snapshot = [copy.copy(instance) for instance in instances]
+        transaction.on_commit(lambda: self.saved(snapshot, created), using=using)
+
+    def defer_deleted(
+        self, instances: Iterable[models.Model], using: Optional[str] = None
+    ):
+        # 삭제 후에는 pk 가 None 으로 바뀌므로 지금 복사해둡니다
+        snapshot = [copy.copy(instance) for instance in instances]
+        transaction.on_commit(lambda: self.deleted(snapshot), using=using)
+
+    def on_save(self, sender, instance, created=False, raw=False, using=None, **kw):
+        if not raw:
+            self.defer_saved([instance], created, using)
+
+    def on_delete(self, sender, instance, using=None, **kwargs):
+        self.defer_deleted([instance], using)
+
+
+_write_through_registry: dict[Type[models.Model], WriteThrough] = {}
+
+
+def register_write_through(model: Type[models.Model], **options) -> WriteThrough:
+    # CommonModel.enable_write_through_cache() 에서 호출합니다
+    handler = WriteThrough(model, **options)
+    _write_through_registry[model] = handler
+    uid = f"common_module.write_through.{model._meta.label}"
+    post_save.connect(handler.on_save, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(handler.on_delete, sender=model, weak=False, dispatch_uid=uid)
+    return handler
+
+
+class WriteThroughQuerySet(models.QuerySet):
+    """
+    시그널이 발생하지 않는 bulk 작업에서도 write-through 를 적용합니다.
+    objects = WriteThroughQuerySet.as_manager()
+    """
+
+    @property
+    def write_through(self) -> Optional[WriteThrough]:
+        return _write_through_registry.get(self.model)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if self.write_through:
+            self.write_through.defer_saved(created, created=True, using=self.db)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if self.write_through:
+            self.write_through.defer_saved(objs, using=self.db)
+        return rows
+
+    def update(self, **kwargs):
+        if not self.write_through:
+            return super().update(**kwargs)
+        pks = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        # 값은 트랜잭션 안에서 지금 읽어두고 커밋 뒤에 반영합니다
+        updated = self.model._default_manager.using(self.db).filter(pk__in=pks)
+        self.write_through.defer_saved(list(updated), using=self.db)
+        return rows
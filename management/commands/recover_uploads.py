@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from common_module.tasks import IMAGE_UPLOAD_RECOVER_AFTER, recover_pending_uploads
+
+
+class Command(BaseCommand):
+    help = "재시작 등으로 큐에서 사라진 pending 이미지 업로드를 다시 넘기고 남은 임시 파일을 정리합니다"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=IMAGE_UPLOAD_RECOVER_AFTER,
+            help="이 시간(초)보다 오래 pending 인 행만 복구합니다",
+        )
+
+    def handle(self, *args, **options):
+        count = recover_pending_uploads(options["older_than"])
+        self.stdout.write(self.style.SUCCESS(f"{count} uploads dispatched"))
@@ -0,0 +1,26 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from common_module.authentications import sync_users
+
+
+class Command(BaseCommand):
+    help = "인증서버 유저 레코드(JSON 배열)를 게이트웨이 유저 테이블에 upsert 하고 캐시를 채웁니다"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-", help="JSON 파일 경로 (기본값: stdin)"
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if path == "-":
+            records = json.load(sys.stdin)
+        else:
+            with open(path) as f:
+                records = json.load(f)
+        count = sync_users(records, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{count} users synced"))
@@ -0,0 +1,251 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Optional, TypedDict
+
+from django.http import HttpResponse
+
+logger = logging.getLogger("common_module.caches")
+
+# 레이턴시 히스토그램 버킷 (초)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class CacheEvent(TypedDict):
+    model_name: str
+    operation: str
+    duration: float
+    hit: Optional[bool]
+    size: int
+
+
+class CacheMetrics:
+    """
+    model_name, operation 별 캐시 카운터와 레이턴시 히스토그램
+    카운터는 항상 집계하고, 레이턴시/바이트/싱크 전달은 sample_rate 비율만 합니다.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = sample_rate
+        self.sinks: list[Callable[[CacheEvent], Any]] = []
+        self._lock = threading.Lock()
+        # (model_name, operation, result) -> 횟수
+        self.counters: dict[tuple[str, str, str], int] = {}
+        # (model_name, operation) -> [버킷별 횟수..., +Inf, 합계, 횟수]
+        self.histograms: dict[tuple[str, str], list[float]] = {}
+        # (model_name, operation) -> 바이트 합계
+        self.payload_bytes: dict[tuple[str, str], int] = {}
+
+    def add_sink(self, sink: Callable[[CacheEvent], Any]):
+        self.sinks.append(sink)
+        return sink
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def record(
+        self,
+        model_name: str,
+        operation: str,
+        duration: Optional[float] = None,
+        hit: Optional[bool] = None,
+        size: int = 0,
+    ):
+        result = "call" if hit is None else ("hit" if hit else "miss")
+        label = (model_name, operation)
+        with self._lock:
+            counter = (model_name, operation, result)
+            self.counters[counter] = self.counters.get(counter, 0) + 1
+            if duration is not None:
+                histogram = self.histograms.get(label)
+                if histogram is None:
+                    histogram = self.histograms[label] = [0] * (len(BUCKETS) + 3)
+                histogram[bisect_left(BUCKETS, duration)] += 1
+                histogram[-2] += duration
+                histogram[-1] += 1
+            if size:
+                self.payload_bytes[label] = self.payload_bytes.get(label, 0) + size
+        if duration is None or not self.sinks:
+            return
+        event = CacheEvent(
+            model_name=model_name,
+            operation=operation,
+            duration=duration,
+            hit=hit,
+            size=size,
+        )
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception:
+                logger.exception("cache metrics sink failed")
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.payload_bytes.clear()
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# TYPE common_cache_operations_total counter",
+        ]
+        with self._lock:
+            for (model_name, operation, result), count in sorted(self.counters.items()):
+                labels = f'model="{model_name}",operation="{operation}"'
+                labels = f'{labels},result="{result}"'
+                lines.append(f"common_cache_operations_total{{{labels}}} {count}")
+            lines.append("# TYPE common_cache_latency_seconds histogram")
+            for (model_name, operation), histogram in sorted(self.histograms.items()):
+                labels = f'model="{model_name}",operation="{operation}"'
+                cumulative = 0
+                for bound, count in zip((*BUCKETS, "+Inf"), histogram):
+                    cumulative += count
+                    lines.append(
+                        f'common_cache_latency_seconds_bucket{{{labels},le="{bound}"}}'
+                        f" {cumulative}"
+                    )
+                total, count = histogram[-2], histogram[-1]
+                lines.append(f"common_cache_latency_seconds_sum{{{labels}}} {total}")
+                lines.append(f"common_cache_latency_seconds_count{{{labels}}} {count}")
+            lines.append("# TYPE common_cache_payload_bytes_total counter")
+            for (model_name, operation), size in sorted(self.payload_bytes.items()):
+                labels = f'model="{model_name}",operation="{operation}"'
+                lines.append(f"common_cache_payload_bytes_total{{{labels}}} {size}")
+        return "\n".join(lines) + "\n"
+
+
+def logging_sink(event: CacheEvent):
+    logger.debug(
+        "cache %s %s %.6fs hit=%s bytes=%s",
+        event["model_name"],
+        event["operation"],
+        event["duration"],
+        event["hit"],
+        event["size"],
+    )
+
+
+def prometheus_view(request):
+    # urls.py 에 path("metrics/cache", prometheus_view) 처럼 연결합니다
+    return HttpResponse(
+        metrics.render_prometheus(), content_type="text/plain; version=0.0.4"
+    )
+
+
+metrics = CacheMetrics(sample_rate=float(os.getenv("CACHE_METRICS_SAMPLE_RATE", "1")))
+
+if os.getenv("CACHE_METRICS_LOG"):
+    metrics.add_sink(logging_sink)
+
+
+# 지금 집계 중인 바깥 호출의 [페이로드 크기, 히트 여부]. 코루틴/쓰레드마다 따로 갖습니다
+_frame: contextvars.ContextVar[Optional[list[Any]]] = contextvars.ContextVar(
+    "cache_metrics_frame", default=None
+)
+
+# 히트/미스를 세는 연산. mark_hit 를 부르지 않으면 결과가 None 이 아닐 때 히트입니다
+HIT_OPERATIONS = frozenset({"get", "get_or_compute"})
+
+
+def add_payload_bytes(size: int):
+    frame = _frame.get()
+    if frame is not None:
+        frame[0] += size
+
+
+def mark_hit(hit: bool):
+    # 결과만으로 알 수 없을 때 (get_or_compute 가 loader 로 계산한 경우) 직접 표시합니다
+    frame = _frame.get()
+    if frame is not None:
+        frame[1] = hit
+
+
+def instrument(operation: str):
+    """
+    CacheBase 메서드의 호출 횟수/레이턴시/페이로드 크기를 기록합니다.
+    update 안에서 부르는 get/set 처럼 중첩된 호출은 바깥 호출 하나로만 집계합니다.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                if _frame.get() is not None:
+                    return await func(self, *args, **kwargs)
+                sampled, start, frame, token = _begin()
+                try:
+                    result = await func(self, *args, **kwargs)
+                finally:
+                    _frame.reset(token)
+                _end(self.model_name, operation, sampled, start, frame, result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if _frame.get() is not None:
+                return func(self, *args, **kwargs)
+            sampled, start, frame, token = _begin()
+            try:
+                result = func(self, *args, **kwargs)
+            finally:
+                _frame.reset(token)
+            _end(self.model_name, operation, sampled, start, frame, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+@contextlib.contextmanager
+def measure(model_name: str, operation: str):
+    """
+    CacheBase 밖의 캐시 코드(유저 스냅샷 등)를 instrument 와 같은 샘플링으로 집계합니다.
+    히트/미스는 블록 안에서 mark_hit 로 표시합니다.
+        with measure("user", "get"):
+            mark_hit(bool(cached))
+    """
+    sampled, start, frame, token = _begin()
+    try:
+        yield
+    finally:
+        _frame.reset(token)
+    _end(model_name, operation, sampled, start, frame, None)
+
+
+def _begin():
+    sampled = metrics.sampled()
+    frame = [0, None]
+    token = _frame.set(frame)
+    return sampled, time.perf_counter() if sampled else 0, frame, token
+
+
+def _end(
+    model_name: str,
+    operation: str,
+    sampled: bool,
+    start: float,
+    frame: list[Any],
+    result,
+):
+    hit = frame[1]
+    if hit is None and operation in HIT_OPERATIONS:
+        hit = result is not None
+    metrics.record(
+        model_name,
+        operation,
+        duration=time.perf_counter() - start if sampled else None,
+        hit=hit,
+        size=frame[0] if sampled else 0,
+    )
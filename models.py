@@ -1,19 +1,89 @@
+import functools
+import logging
 import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
+from typing import IO, Iterable, NamedTuple, Optional
 from uuid import uuid4
 from dotenv import load_dotenv
-from django.db import models
+from django.db import models, transaction
+from django.core.files.base import ContentFile
 from django.core.files.storage import Storage, default_storage
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 
+try:
+    from PIL import Image as PILImage
+except ImportError:  # Pillow 가 없으면 변환 없이 원본만 저장합니다
+    PILImage = None
+
 load_dotenv()
 
+logger = logging.getLogger("common_module.models")
+
 default_storage: Storage = default_storage
 
 APP_NAME = os.getenv("DB_NAME")
 
+# 이미지 업로드 방식: sync (요청 안에서 저장), thread (로컬 워커), celery
+IMAGE_UPLOAD_BACKEND = os.getenv("IMAGE_UPLOAD_BACKEND", "sync")
+# 켜면 백그라운드 방식이어도 커밋을 기다리지 않고 바로 업로드합니다 (테스트용)
+IMAGE_UPLOAD_EAGER = bool(os.getenv("IMAGE_UPLOAD_EAGER"))
+# 업로드 전 임시 파일 위치. celery 워커와 같은 호스트/볼륨이어야 합니다
+IMAGE_SPOOL_DIR = os.getenv("IMAGE_SPOOL_DIR") or tempfile.gettempdir()
+
+
+class VariantSpec(NamedTuple):
+    name: str
+    width: int
+    height: int
+    format: str
+
+
+def parse_variant_specs(value: str) -> list[VariantSpec]:
+    # "thumb:160x160:webp,medium:640x640:jpeg" 형식
+    specs = []
+    for item in filter(None, (x.strip() for x in value.split(","))):
+        name, size, format = item.split(":")
+        width, height = size.lower().split("x")
+        specs.append(VariantSpec(name, int(width), int(height), format.lower()))
+    return specs
+
+
+IMAGE_VARIANTS = parse_variant_specs(os.getenv("IMAGE_VARIANTS", ""))
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "4"))
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+# 이보다 픽셀이 많은 원본은 디코딩하지 않습니다 (기본 4000만, 약 8000x5000)
+IMAGE_VARIANT_MAX_PIXELS = int(os.getenv("IMAGE_VARIANT_MAX_PIXELS", "40000000"))
+
+# 포맷 -> (PIL 포맷, 확장자)
+IMAGE_FORMATS = {
+    "jpeg": ("JPEG", "jpeg"),
+    "jpg": ("JPEG", "jpeg"),
+    "png": ("PNG", "png"),
+    "webp": ("WEBP", "webp"),
+    "gif": ("GIF", "gif"),
+}
+
+_variant_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_VARIANT_WORKERS, thread_name_prefix="image-variant"
+)
+
+IMAGE_STORAGE_WORKERS = int(os.getenv("IMAGE_STORAGE_WORKERS", "8"))
+
+# 여러 이미지를 스토리지에 동시에 쓰고 지우기 위한 워커
+_storage_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_STORAGE_WORKERS, thread_name_prefix="image-storage"
+)
+
+
+def delete_storage_files(paths: Iterable[str]):
+    for path in paths:
+        _storage_executor.submit(default_storage.delete, path)
+
+
 if not APP_NAME:
     raise Exception("앱 이름이 정해지지 않았습니다")
 
@@ -27,6 +97,11 @@ class BaseModel(models.Model):
 
 
 class Image(BaseModel):
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        READY = "ready"
+        FAILED = "failed"
+
     user_id = models.PositiveIntegerField()
 
     content_type = models.ForeignKey(
@@ -37,35 +112,276 @@ class Image(BaseModel):
 
     url = models.TextField()
     path = models.CharField(max_length=1024)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.READY
+    )
 
     @classmethod
     def create_single_instance(
         cls, user_id: int, object: "CommonModel", image: BytesIO | InMemoryUploadedFile
     ):
-        images = object.images.filter(object_id=object.pk)
-        is_images = images.exists()
-        if is_images:
-            images.delete()
-        return cls.create_image(user_id, object, image)
+        return cls.bulk_create_images(user_id, object, [image], replace=True)[0]
+
+    @classmethod
+    def delete_images(cls, object: models.Model) -> int:
+        """
+        object 의 이미지를 지웁니다. 파일 경로를 읽는 SELECT 한 번이 exists 확인을
+        겸하고, 행은 QuerySet.delete 로 지워서 삭제 시그널도 그대로 나갑니다.
+        스토리지 파일은 커밋된 뒤에 워커에서 정리합니다.
+        """
+        images = Image.objects.filter(
+            content_type=ContentType.objects.get_for_model(object),
+            object_id=object.pk,
+        )
+        ids, paths, variant_paths = set(), set(), set()
+        for pk, path, variant_path in images.values_list(
+            "pk", "path", "variants__path"
+        ):
+            ids.add(pk)
+            paths.add(path)
+            if variant_path:
+                variant_paths.add(variant_path)
+        if not ids:
+            return 0
+        # 변형 행은 Collector 가 fast delete 로 한 번에 지웁니다
+        _, per_model = Image.objects.filter(pk__in=ids).delete()
+        transaction.on_commit(
+            functools.partial(delete_storage_files, [*paths, *variant_paths])
+        )
+        return per_model.get(Image._meta.label, 0)
 
     def delete(self, *args, **kwargs) -> tuple[int, dict[str, int]]:
-        default_storage.delete(self.path)
+        self.delete_files()
         return super(BaseModel, self).delete(*args, **kwargs)
 
+    def delete_files(self):
+        for path in self.variants.values_list("path", flat=True):
+            default_storage.delete(path)
+        default_storage.delete(self.path)
+
+    @classmethod
+    def detect_extension(cls, file: BytesIO | InMemoryUploadedFile) -> str:
+        # 헤더만 읽어서 실제 포맷으로 확장자를 정합니다
+        if PILImage is not None:
+            try:
+                with PILImage.open(file) as img:
+                    format = (img.format or "").lower()
+            except (OSError, ValueError):
+                format = ""
+            finally:
+                file.seek(0)
+            if format in IMAGE_FORMATS:
+                return IMAGE_FORMATS[format][1]
+        name = getattr(file, "name", None) or ""
+        ext = os.path.splitext(name)[1].lstrip(".").lower()
+        return IMAGE_FORMATS[ext][1] if ext in IMAGE_FORMATS else "jpeg"
+
+    def create_variants(self, source: IO[bytes] | str):
+        """
+        IMAGE_VARIANTS 크기별로 썸네일을 만들어 원본 옆에 저장합니다.
+        변환이 실패해도 원본은 그대로 두고 로그만 남깁니다.
+        """
+        variants = self.collect_variants(self.start_variants(source))
+        return ImageVariant.objects.bulk_create(variants)
+
+    def start_variants(self, source: IO[bytes] | str) -> Optional[Future]:
+        # source 는 업로드 파일 객체나 임시 파일 경로. 워커에서 한 번만 디코딩합니다
+        if PILImage is None or not IMAGE_VARIANTS:
+            return None
+        base = os.path.splitext(self.path)[0]
+        return _variant_executor.submit(render_variants, source, base)
+
+    def collect_variants(self, future: Optional[Future]) -> list["ImageVariant"]:
+        # 저장하지 않은 ImageVariant 목록. 여러 이미지를 모아 한 번에 bulk_create 합니다
+        if future is None:
+            return []
+        try:
+            rendered = future.result()
+        except Exception:
+            logger.exception("image variants failed image_id=%s", self.pk)
+            return []
+        return [
+            ImageVariant(
+                image=self,
+                name=spec.name,
+                format=IMAGE_FORMATS[spec.format][1],
+                width=width,
+                height=height,
+                url=default_storage.url(path),
+                path=path,
+            )
+            for spec, path, width, height in rendered
+        ]
+
     @classmethod
     def create_image(
         cls, user_id: int, object: models.Model, image: BytesIO | InMemoryUploadedFile
     ):
+        return cls.bulk_create_images(user_id, object, [image])[0]
+
+    @classmethod
+    def bulk_create_images(
+        cls,
+        user_id: int,
+        object: models.Model,
+        images: list[BytesIO | InMemoryUploadedFile],
+        replace: bool = False,
+    ) -> list["Image"]:
+        """
+        여러 이미지를 스토리지에 동시에 올리고 bulk_create 한 번으로 저장합니다.
+        bulk_create 는 post_save 를 보내지 않습니다. 한 장일 때는 objects.create 로
+        저장해서 기존처럼 시그널이 갑니다.
+        replace 면 기존 이미지를 먼저 지웁니다.
+        """
+        if replace:
+            cls.delete_images(object)
+        if not images:
+            return []
         model_name = object.__class__.__name__.lower()
-        file_path = f"{APP_NAME}/{model_name}/{uuid4()}.jpeg"
-        # with utils.Image.resize_image(image, "jpeg") as img:
-        file_url = cls.save_image_to_storage(file_path, image)
-        return Image.objects.create(
-            user_id=user_id,
-            content_object=object,
-            url=file_url,
-            path=file_path,
+        paths = [
+            f"{APP_NAME}/{model_name}/{uuid4()}.{cls.detect_extension(image)}"
+            for image in images
+        ]
+        if IMAGE_UPLOAD_BACKEND == "sync":
+            urls = cls.save_images_to_storage(paths, images)
+            instances = cls.insert_images(user_id, object, paths, urls)
+            # 이미지마다 워커 하나에서 디코딩하므로 동시에 풀리는 원본은 워커 수 이하입니다
+            pending = [
+                instance.start_variants(image)
+                for instance, image in zip(instances, images)
+            ]
+            variants = [
+                variant
+                for instance, future in zip(instances, pending)
+                for variant in instance.collect_variants(future)
+            ]
+            ImageVariant.objects.bulk_create(variants)
+            return instances
+        # 업로드는 백그라운드로 넘기고 pending 상태로 먼저 만듭니다
+        spool_paths = [
+            cls.spool_image(path, image) for path, image in zip(paths, images)
+        ]
+        instances = cls.insert_images(
+            user_id, object, paths, [""] * len(paths), cls.Status.PENDING
+        )
+        from common_module.tasks import dispatch_image_upload
+
+        for instance, spool_path in zip(instances, spool_paths):
+            upload = functools.partial(dispatch_image_upload, instance.pk, spool_path)
+            if IMAGE_UPLOAD_EAGER:
+                upload()
+                instance.refresh_from_db(fields=["url", "status"])
+            else:
+                transaction.on_commit(upload)
+        return instances
+
+    @classmethod
+    def insert_images(
+        cls,
+        user_id: int,
+        object: models.Model,
+        paths: list[str],
+        urls: list[str],
+        status: str = Status.READY,
+    ) -> list["Image"]:
+        content_type = ContentType.objects.get_for_model(object)
+        rows = [
+            dict(
+                user_id=user_id,
+                content_type=content_type,
+                object_id=object.pk,
+                url=url,
+                path=path,
+                status=status,
+            )
+            for path, url in zip(paths, urls)
+        ]
+        if len(rows) == 1:
+            return [Image.objects.create(**rows[0])]
+        instances = Image.objects.bulk_create([Image(**row) for row in rows])
+        if any(instance.pk is None for instance in instances):
+            # MySQL 은 bulk_create 후 pk 를 채워주지 않아서 path 로 다시 찾습니다
+            pks = dict(Image.objects.filter(path__in=paths).values_list("path", "pk"))
+            for instance in instances:
+                instance.pk = pks[instance.path]
+                instance._state.adding = False
+        return instances
+
+    @classmethod
+    def save_images_to_storage(
+        cls, paths: list[str], files: list[BytesIO | InMemoryUploadedFile]
+    ) -> list[str]:
+        # 하나라도 실패하면 이미 올린 파일을 지우고 예외를 그대로 올립니다
+        futures = [
+            _storage_executor.submit(cls.save_image_to_storage, path, file)
+            for path, file in zip(paths, files)
+        ]
+        urls, error = [], None
+        for future in futures:
+            try:
+                urls.append(future.result())
+            except Exception as e:
+                urls.append(None)
+                error = error or e
+        if error is not None:
+            for path, url in zip(paths, urls):
+                if url is not None:
+                    default_storage.delete(path)
+            raise error
+        return urls
+
+    @classmethod
+    def spool_path(cls, path: str) -> str:
+        # 스토리지 경로에서 정해지므로 재시작 뒤에도 pending 행의 임시 파일을 찾을 수 있습니다
+        return os.path.join(IMAGE_SPOOL_DIR, f"image-{os.path.basename(path)}")
+
+    @classmethod
+    def spool_image(cls, path: str, file: BytesIO | InMemoryUploadedFile) -> str:
+        # 요청이 끝나도 워커가 읽을 수 있도록 로컬 임시 파일로 옮겨둡니다
+        spool_path = cls.spool_path(path)
+        with open(spool_path, "xb") as spool:
+            if hasattr(file, "chunks"):
+                for chunk in file.chunks():
+                    spool.write(chunk)
+            else:
+                file.seek(0)
+                spool.write(file.read())
+        return spool_path
+
+    @classmethod
+    def finish_upload(cls, image_id: int, spool_path: str):
+        """
+        임시 파일을 스토리지에 올리고 url 과 상태를 채웁니다.
+        그 사이 행이 지워졌으면 올린 파일도 지웁니다.
+        """
+        instance = Image.objects.filter(pk=image_id).only("path", "status").first()
+        if instance is None or instance.status != cls.Status.PENDING:
+            # 지워졌거나 복구 sweep 과 겹쳐 이미 처리된 행
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+            return
+        with open(spool_path, "rb") as spool:
+            file_url = cls.save_image_to_storage(instance.path, spool)
+        variants = []
+        if not instance.variants.exists():
+            variants = instance.create_variants(spool_path)
+        updated = Image.objects.filter(pk=image_id).update(
+            url=file_url, status=cls.Status.READY
+        )
+        if not updated:
+            for variant in variants:
+                default_storage.delete(variant.path)
+            default_storage.delete(instance.path)
+        os.remove(spool_path)
+
+    @classmethod
+    def fail_upload(cls, image_id: int, spool_path: str):
+        # 이미 다른 워커가 올렸으면 (복구로 두 번 넘어간 경우) 건드리지 않습니다
+        Image.objects.filter(pk=image_id, status=cls.Status.PENDING).update(
+            status=cls.Status.FAILED
         )
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
 
     @classmethod
     def save_image_to_storage(
@@ -75,13 +391,97 @@ class Image(BaseModel):
         return default_storage.url(file_path)
 
 
+def render_variants(
+    source: IO[bytes] | str, base: str
+) -> list[tuple[VariantSpec, str, int, int]]:
+    """
+    원본은 한 번만 디코딩합니다. 모든 크기를 만들 수 있는 가장 작은 크기로 먼저 줄이고
+    (JPEG 는 draft 로 디코딩 단계에서부터 축소), 각 크기는 그 결과에서 만듭니다.
+    업로드 파일 객체는 복사하지 않고 그대로 읽습니다.
+    IMAGE_VARIANT_MAX_PIXELS 를 넘는 원본은 헤더만 읽고 ValueError 를 냅니다.
+    """
+    if not isinstance(source, str):
+        source.seek(0)
+    rendered = []
+    try:
+        with PILImage.open(source) as img:
+            width, height = img.size
+            if width * height > IMAGE_VARIANT_MAX_PIXELS:
+                raise ValueError(f"image too large for variants: {width}x{height}")
+            scale = max(
+                min(spec.width / width, spec.height / height, 1.0)
+                for spec in IMAGE_VARIANTS
+            )
+            box = (max(1, round(width * scale)), max(1, round(height * scale)))
+            img.draft("RGB", box)
+            img.thumbnail(box)
+            for spec in IMAGE_VARIANTS:
+                try:
+                    rendered.append((spec, *save_variant(img, spec, base)))
+                except Exception:
+                    logger.exception("image variant %s failed path=%s", spec.name, base)
+    finally:
+        if not isinstance(source, str):
+            source.seek(0)
+    return rendered
+
+
+def save_variant(img, spec: VariantSpec, base: str) -> tuple[str, int, int]:
+    pil_format, ext = IMAGE_FORMATS[spec.format]
+    variant = img.copy()
+    variant.thumbnail((spec.width, spec.height))
+    if pil_format == "JPEG" and variant.mode not in ("RGB", "L"):
+        variant = variant.convert("RGB")
+    buffer = BytesIO()
+    variant.save(buffer, pil_format, quality=IMAGE_VARIANT_QUALITY)
+    path = f"{base}_{spec.name}.{ext}"
+    path = default_storage.save(path, ContentFile(buffer.getvalue()))
+    return path, *variant.size
+
+
+class ImageVariant(BaseModel):
+    class Meta:
+        unique_together = ("image", "name")
+
+    image = models.ForeignKey(Image, related_name="variants", on_delete=models.CASCADE)
+    name = models.CharField(max_length=64)
+    format = models.CharField(max_length=16)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    url = models.TextField()
+    path = models.CharField(max_length=1024)
+
+
 class ImageMixin(models.Model):
     class Meta:
         abstract = True
 
     images = GenericRelation(Image)
 
+    def attach_images(
+        self,
+        user_id: int,
+        images: list[BytesIO | InMemoryUploadedFile],
+        replace: bool = False,
+    ) -> list[Image]:
+        return Image.bulk_create_images(user_id, self, images, replace=replace)
+
+    def replace_images(
+        self, user_id: int, images: list[BytesIO | InMemoryUploadedFile]
+    ) -> list[Image]:
+        return self.attach_images(user_id, images, replace=True)
+
 
 class CommonModel(ImageMixin, BaseModel):
     class Meta:
         abstract = True
+
+    @classmethod
+    def enable_write_through_cache(cls, **options):
+        """
+        저장/삭제 시그널로 캐시를 갱신합니다. apps.ready() 에서 호출하세요.
+        bulk 작업까지 반영하려면 objects = WriteThroughQuerySet.as_manager()
+        """
+        from common_module.caches import register_write_through
+
+        return register_write_through(cls, **options)
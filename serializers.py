@@ -7,7 +7,7 @@ from common_module.exceptions import ConflictException
 from .views import UseTokenizedRequestsMixin
 
 from .utils import MockRequest
-from .models import CommonModel, Image
+from .models import CommonModel, Image, ImageVariant
 
 T = TypeVar("T", bound=CommonModel)
 
@@ -53,10 +53,24 @@ class BaseSerializer(ContextMixin, serializers.ModelSerializer):
     context: SerializerContext
 
 
+class ImageVariantSerializer(BaseSerializer):
+    class Meta:
+        model = ImageVariant
+        fields = ("name", "url", "format", "width", "height")
+
+
 class ImageSerializer(BaseSerializer):
+    """
+    목록에서는 queryset 에 prefetch_related("images__variants") 를 걸어주세요
+    """
+
+    variants = ImageVariantSerializer(many=True, read_only=True)
+
     class Meta:
         model = Image
-        fields = ("url", "path")
+        # 백그라운드 업로드 중이면 status 가 pending 이고 url 이 비어 있습니다
+        fields = ("id", "url", "path", "status", "variants")
+        read_only_fields = ("status",)
 
 
 def UserIdInjector(func):
@@ -0,0 +1,108 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from celery import shared_task
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import models
+from .models import IMAGE_UPLOAD_BACKEND, IMAGE_UPLOAD_EAGER, Image
+
+logger = logging.getLogger("common_module.tasks")
+
+IMAGE_UPLOAD_RETRIES = int(os.getenv("IMAGE_UPLOAD_RETRIES", "3"))
+IMAGE_UPLOAD_BACKOFF = float(os.getenv("IMAGE_UPLOAD_BACKOFF", "1"))
+IMAGE_UPLOAD_WORKERS = int(os.getenv("IMAGE_UPLOAD_WORKERS", "4"))
+# 이 시간(초)이 지나도 pending 인 행은 큐에서 사라진 것으로 보고 복구합니다
+IMAGE_UPLOAD_RECOVER_AFTER = int(os.getenv("IMAGE_UPLOAD_RECOVER_AFTER", "3600"))
+
+_upload_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_UPLOAD_WORKERS, thread_name_prefix="image-upload"
+)
+
+
+@shared_task(bind=True, max_retries=IMAGE_UPLOAD_RETRIES, acks_late=True)
+def upload_image(self, image_id: int, spool_path: str):
+    try:
+        Image.finish_upload(image_id, spool_path)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.exception("image upload failed image_id=%s", image_id)
+            Image.fail_upload(image_id, spool_path)
+            raise
+        raise self.retry(
+            exc=exc, countdown=IMAGE_UPLOAD_BACKOFF * 2**self.request.retries
+        )
+
+
+def upload_image_locally(image_id: int, spool_path: str):
+    # celery 없이 돌릴 때의 재시도 루프
+    for attempt in range(IMAGE_UPLOAD_RETRIES + 1):
+        try:
+            return Image.finish_upload(image_id, spool_path)
+        except Exception:
+            if attempt == IMAGE_UPLOAD_RETRIES:
+                logger.exception("image upload failed image_id=%s", image_id)
+                return Image.fail_upload(image_id, spool_path)
+            time.sleep(IMAGE_UPLOAD_BACKOFF * 2**attempt)
+
+
+def _upload_in_worker(image_id: int, spool_path: str):
+    # 워커 쓰레드의 DB 커넥션은 요청 사이클이 정리해주지 않습니다
+    try:
+        upload_image_locally(image_id, spool_path)
+    finally:
+        close_old_connections()
+
+
+def dispatch_image_upload(image_id: int, spool_path: str):
+    """
+    IMAGE_UPLOAD_BACKEND 에 맞게 업로드를 넘깁니다.
+    IMAGE_UPLOAD_EAGER 면 지금 쓰레드에서 끝까지 올립니다.
+    """
+    if IMAGE_UPLOAD_EAGER:
+        if IMAGE_UPLOAD_BACKEND == "celery":
+            upload_image.apply(args=(image_id, spool_path))
+        else:
+            upload_image_locally(image_id, spool_path)
+        return
+    if IMAGE_UPLOAD_BACKEND == "celery":
+        upload_image.delay(image_id, spool_path)
+    else:
+        _upload_executor.submit(_upload_in_worker, image_id, spool_path)
+
+
+def recover_pending_uploads(older_than: int = IMAGE_UPLOAD_RECOVER_AFTER) -> int:
+    """
+    thread 방식의 큐는 메모리에만 있어서 프로세스가 재시작되면 사라집니다.
+    오래된 pending 행은 임시 파일이 남아 있으면 다시 넘기고, 없으면 failed 로 둡니다.
+    행이 없는 오래된 임시 파일은 지웁니다. 배포 후나 cron 으로 recover_uploads 를
+    돌려주세요. 다시 넘긴 행 수를 돌려줍니다.
+    """
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    pending = Image.objects.filter(status=Image.Status.PENDING)
+    spooled = {
+        Image.spool_path(path) for path in pending.values_list("path", flat=True)
+    }
+    dispatched = 0
+    for image_id, path in pending.filter(updated_at__lt=cutoff).values_list(
+        "pk", "path"
+    ):
+        spool_path = Image.spool_path(path)
+        if os.path.exists(spool_path):
+            dispatch_image_upload(image_id, spool_path)
+            dispatched += 1
+        else:
+            logger.warning("image upload lost image_id=%s", image_id)
+            Image.fail_upload(image_id, spool_path)
+    for entry in os.scandir(models.IMAGE_SPOOL_DIR):
+        if (
+            entry.name.startswith("image-")
+            and entry.path not in spooled
+            and entry.stat().st_mtime < cutoff.timestamp()
+        ):
+            os.remove(entry.path)
+    return dispatched
@@ -2,7 +2,10 @@ from dataclasses import dataclass, field
 import functools
 import os
 import json
+import threading
+import time
 import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from dotenv import load_dotenv
 from typing import (
     Any,
@@ -204,6 +207,72 @@ class MockContext:
 
 mock_context = MockContext()
 
+
+class StubServer:
+    """
+    인증서버 같은 외부 서버 대역
+    responses 의 (status, body[, delay]) 를 순서대로 응답하고 마지막 응답을 반복합니다.
+    calls 로 받은 요청 수를, connections 로 맺은 커넥션 수를 셉니다 (keep-alive 지원).
+        with StubServer([(200, {"user_id": 1})]) as server:
+            ServerRequests(server.url, token).get("/users/1/")
+    """
+
+    def __init__(self, responses: Optional[list[tuple]] = None):
+        self.responses = list(responses or [(200, {})])
+        self.calls = 0
+        self.connections = 0
+        self.paths: list[str] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # keep-alive 에서 헤더/본문을 따로 쓰면 delayed ACK 로 40ms 씩 밀립니다
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                status, body, *delay = stub.next_response(self.path)
+                if delay:
+                    time.sleep(delay[0])
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = reply
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def next_response(self, path: str) -> tuple:
+        with self._lock:
+            response = self.responses[min(self.calls, len(self.responses) - 1)]
+            self.calls += 1
+            self.paths.append(path)
+        return response
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
 P = ParamSpec("P")
 R = TypeVar("R")
 
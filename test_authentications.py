@@ -0,0 +1,50 @@
+import os
+import time
+from unittest import mock
+from uuid import uuid4
+
+from django.test import RequestFactory
+from rest_framework import exceptions
+
+from .authentications import ThirdPartyAuthentication
+from .exceptions import ServiceUnavailableException
+from .test import StubServer, TestCase
+
+
+class ThirdPartyAuthenticationTest(TestCase):
+    def authenticate(self, server: StubServer, header: str):
+        request = RequestFactory().post("/", HTTP_AUTHORIZATION=header)
+        with mock.patch.dict(os.environ, {"AUTH_SERVER": server.url}):
+            return ThirdPartyAuthentication().authenticate(request)
+
+    def header(self):
+        # 테스트마다 캐시 키가 겹치지 않도록 새 토큰을 씁니다
+        return f"Bearer {uuid4().hex}"
+
+    def test_success_is_cached(self):
+        user = {"user_id": 1, "exp": time.time() + 60}
+        header = self.header()
+        with StubServer([(200, user)]) as server:
+            for _ in range(3):
+                result, _ = self.authenticate(server, header)
+        self.assertEqual(result["user_id"], 1)
+        self.assertEqual(server.calls, 1)
+
+    def test_unknown_user_is_negatively_cached(self):
+        header = self.header()
+        with StubServer([(404, {})]) as server:
+            for _ in range(3):
+                with self.assertRaises(exceptions.AuthenticationFailed):
+                    self.authenticate(server, header)
+        self.assertEqual(server.calls, 1)
+
+    def test_server_error_is_not_cached(self):
+        user = {"user_id": 1, "exp": time.time() + 60}
+        for status in (500, 429):
+            header = self.header()
+            with StubServer([(status, {}), (200, user)]) as server:
+                with self.assertRaises(ServiceUnavailableException):
+                    self.authenticate(server, header)
+                result, _ = self.authenticate(server, header)
+            self.assertEqual(result["user_id"], 1)
+            self.assertEqual(server.calls, 2)
@@ -0,0 +1,241 @@
+import datetime
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+from uuid import uuid4
+
+from . import caches
+from .authentications import Token, has_user_cached
+from .caches import (
+    JSONModelCodec,
+    ModelTupleCodec,
+    MsgpackModelCodec,
+    PickleCodec,
+    UseIterCache,
+    UseSingleCache,
+    WriteThrough,
+    cache,
+    msgpack,
+)
+from .models import Image
+from .metrics import metrics
+from .test import TestCase
+
+
+class CacheMetricsTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        # fakeredis 서버는 테스트 사이에 비워지지 않아서 모델 이름을 매번 바꿉니다
+        self.model_name = f"metrics-{uuid4().hex}"
+
+    def test_get_or_compute_records_hit_ratio(self):
+        cache = UseSingleCache(1, self.model_name)
+        loader = mock.Mock(return_value="value")
+        for _ in range(3):
+            self.assertEqual(cache.get_or_compute(loader, 60, id=1), "value")
+        self.assertEqual(loader.call_count, 1)
+        counters = metrics.counters
+        self.assertEqual(counters[(self.model_name, "get_or_compute", "miss")], 1)
+        self.assertEqual(counters[(self.model_name, "get_or_compute", "hit")], 2)
+
+    def test_user_cache_respects_sample_rate(self):
+        with mock.patch.object(metrics, "sample_rate", 0):
+            self.assertFalse(has_user_cached(Token.make_user_token(10**9)))
+        # 횟수는 항상 세고, 레이턴시는 샘플된 호출만 기록합니다
+        self.assertEqual(metrics.counters[("user", "get", "miss")], 1)
+        self.assertNotIn(("user", "get"), metrics.histograms)
+
+
+class GenerationTest(TestCase):
+    def setUp(self):
+        self.model_name = f"generation-{uuid4().hex}"
+
+    def wait_for_sweep(self):
+        caches._sweep_executor.submit(lambda: None).result()
+
+    def exists(self, key: str) -> bool:
+        return bool(cache.client.get_client().exists(cache.make_key(key)))
+
+    def test_long_lived_instance_sees_invalidation(self):
+        reader = UseSingleCache(1, self.model_name)
+        reader.set("value", k=1)
+        self.assertEqual(reader.get(k=1), "value")
+        UseSingleCache(2, self.model_name).invalidate_model()
+        self.assertIsNone(reader.get(k=1))
+
+    def test_values_without_timeout_expire(self):
+        single = UseSingleCache(1, self.model_name)
+        single.set("value", k=1)
+        ttl = cache.client.get_client().ttl(cache.make_key(single.key({"k": 1})))
+        self.assertGreater(ttl, 0)
+        self.assertLessEqual(ttl, single.default_timeout)
+
+    def test_invalidate_model_unlinks_old_generation(self):
+        owner, other = UseSingleCache(1, self.model_name), UseSingleCache(
+            2, self.model_name
+        )
+        owner.set("value", k=1)
+        other.set("value", k=1)
+        old_keys = [owner.key({"k": 1}), other.key({"k": 1})]
+        old_index = owner.global_key
+        owner.invalidate_model()
+        self.wait_for_sweep()
+        for key in [*old_keys, old_index]:
+            self.assertFalse(self.exists(key))
+
+    def test_invalidate_user_unlinks_old_generation(self):
+        owner, other = UseSingleCache(1, self.model_name), UseSingleCache(
+            2, self.model_name
+        )
+        owner.set("value", k=1)
+        other.set("value", k=1)
+        owner_key, other_key = owner.key({"k": 1}), other.key({"k": 1})
+        owner.invalidate_user()
+        self.assertFalse(self.exists(owner_key))
+        self.assertTrue(self.exists(other_key))
+        self.assertEqual(owner.get_global_keys(), [other_key])
+
+
+class WriteThroughTest(TestCase):
+    def setUp(self):
+        self.model_name = f"write-through-{uuid4().hex}"
+        self.handler = WriteThrough(Image, model_name=self.model_name)
+        self.image = Image(pk=1, user_id=1, url="old")
+
+    def test_saved_purges_cached_lists(self):
+        owner = UseIterCache(1, self.model_name)
+        shared = UseIterCache(0, self.model_name)
+        owner.set([self.image], page=1)
+        shared.set([self.image], page=1)
+        self.handler.saved([Image(pk=1, user_id=1, url="new")])
+        self.assertIsNone(owner.get(page=1))
+        self.assertIsNone(shared.get(page=1))
+
+    def test_deleted_purges_cached_lists(self):
+        owner = UseIterCache(1, self.model_name)
+        owner.set([self.image], page=1)
+        self.handler.deleted([self.image])
+        self.assertIsNone(owner.get(page=1))
+
+
+# 벤치마크는 BENCHMARK=1 일 때만 돌립니다
+benchmark = unittest.skipUnless(os.getenv("BENCHMARK"), "BENCHMARK 환경변수 필요")
+
+
+def make_images(count: int) -> list[Image]:
+    created_at = datetime.datetime(
+        2023, 3, 1, 12, 30, 15, 123456, datetime.timezone.utc
+    )
+    return [
+        Image(
+            pk=pk,
+            created_at=created_at,
+            updated_at=created_at,
+            user_id=pk,
+            content_type_id=1,
+            object_id=pk,
+            url=f"https://cdn.example.com/app/image/{pk}.jpeg",
+            path=f"app/image/{pk}.jpeg",
+            status=Image.Status.READY,
+        )
+        for pk in range(1, count + 1)
+    ]
+
+
+class CodecTest(TestCase):
+    def codecs(self):
+        codecs = [ModelTupleCodec(), JSONModelCodec()]
+        if msgpack is not None:
+            codecs.append(MsgpackModelCodec())
+        return codecs
+
+    def test_round_trip_keeps_microseconds(self):
+        image = make_images(1)[0]
+        for codec in self.codecs():
+            with self.subTest(codec=type(codec).__name__):
+                restored = codec.loads(codec.dumps(image))
+                self.assertEqual(restored.created_at, image.created_at)
+                self.assertEqual(restored.url, image.url)
+                self.assertFalse(restored._state.adding)
+
+    @benchmark
+    def test_bytes_and_decode_time(self):
+        images = make_images(100)
+        rounds = 200
+        print()
+        for codec in [PickleCodec(), *self.codecs()]:
+            data = [codec.dumps(image) for image in images]
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for value in data:
+                    codec.loads(value)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{type(codec).__name__:<20}"
+                f" {sum(map(len, data)) / len(data):8.1f} bytes/entry"
+                f" {elapsed / (rounds * len(data)) * 1e6:8.2f} us/decode"
+            )
+
+
+class KeyIndexTest(TestCase):
+    def setUp(self):
+        self.model_name = f"index-{uuid4().hex}"
+        self.single = UseSingleCache(1, self.model_name)
+
+    def test_set_registers_key_in_model_and_user_index(self):
+        self.single.set("value", k=1)
+        key = self.single.key({"k": 1})
+        self.assertEqual(self.single.get_global_keys(), [key])
+        self.assertEqual(self.single.get_user_keys(), [key])
+        self.assertEqual(UseSingleCache(2, self.model_name).get_user_keys(), [])
+
+    def test_get_does_not_touch_index(self):
+        self.assertIsNone(self.single.get(k=1))
+        self.single.set("value", k=1)
+        with mock.patch.object(UseSingleCache, "add_global_keys") as add:
+            self.assertEqual(self.single.get(k=1), "value")
+        add.assert_not_called()
+
+    def test_purge_removes_key_from_index(self):
+        self.single.set("value", k=1)
+        self.single.set("value", k=2)
+        self.single.purge(k=1)
+        self.assertIsNone(self.single.get(k=1))
+        self.assertEqual(self.single.get_global_keys(), [self.single.key({"k": 2})])
+
+    def test_concurrent_writers_keep_every_key(self):
+        def write(start: int):
+            writer = UseSingleCache(1, self.model_name)
+            for k in range(start, start + 50):
+                writer.set("value", k=k)
+
+        threads = [threading.Thread(target=write, args=(i * 50,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.single.get_global_keys()), 200)
+
+    @benchmark
+    def test_get_latency_with_index_size(self):
+        self.single.set("value", k=0)
+        index_keys = self.single.index_keys()
+        client = self.single.client
+        rounds = 500
+        size = 0
+        print()
+        for target in (0, 1_000, 10_000, 100_000):
+            pipe = client.pipeline(transaction=False)
+            for n in range(size, target):
+                for index_key in index_keys:
+                    pipe.sadd(index_key, f"filler:{n}")
+            pipe.execute()
+            size = target
+            start = time.perf_counter()
+            for _ in range(rounds):
+                self.single.get(k=0)
+            elapsed = time.perf_counter() - start
+            print(f"index {size:>7} keys: {elapsed / rounds * 1e6:8.1f} us/get")
@@ -0,0 +1,103 @@
+import os
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import FileSystemStorage
+from PIL import Image as PILImage
+
+from . import models, tasks
+from .models import Image
+from .test import TestCase
+
+
+class BackgroundUploadTest(TestCase):
+    """
+    IMAGE_UPLOAD_BACKEND=thread 를 eager 로 돌려서 업로드 파이프라인을 확인합니다.
+    """
+
+    def setUp(self):
+        self.storage_dir = tempfile.TemporaryDirectory()
+        self.spool_dir = tempfile.TemporaryDirectory()
+        storage = FileSystemStorage(location=self.storage_dir.name, base_url="/media/")
+        patches = [
+            mock.patch.object(models, "default_storage", storage),
+            mock.patch.object(models, "IMAGE_UPLOAD_BACKEND", "thread"),
+            mock.patch.object(models, "IMAGE_SPOOL_DIR", self.spool_dir.name),
+            mock.patch.object(tasks, "IMAGE_UPLOAD_BACKEND", "thread"),
+            mock.patch.object(tasks, "IMAGE_UPLOAD_EAGER", True),
+            mock.patch.object(tasks, "IMAGE_UPLOAD_BACKOFF", 0),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.storage_dir.cleanup)
+        self.addCleanup(self.spool_dir.cleanup)
+        # 이미지를 붙일 대상. 이 앱에는 구체 모델이 없어서 ContentType 행을 씁니다
+        self.object = ContentType.objects.get_for_model(Image)
+
+    def upload(self) -> Image:
+        # 커밋 전까지는 pending 이고, 커밋 콜백에서 eager 로 업로드합니다
+        with self.captureOnCommitCallbacks() as callbacks:
+            image = Image.create_image(1, self.object, BytesIO(b"image bytes"))
+        self.assertEqual(image.status, Image.Status.PENDING)
+        self.assertEqual(image.url, "")
+        self.assertEqual(len(os.listdir(self.spool_dir.name)), 1)
+        for callback in callbacks:
+            callback()
+        image.refresh_from_db()
+        return image
+
+    def test_pending_to_ready(self):
+        image = self.upload()
+        self.assertEqual(image.status, Image.Status.READY)
+        self.assertTrue(image.url.startswith("/media/"))
+        self.assertTrue(models.default_storage.exists(image.path))
+        self.assertEqual(os.listdir(self.spool_dir.name), [])
+
+    def test_retries_then_failed(self):
+        with mock.patch.object(
+            Image, "save_image_to_storage", side_effect=OSError("storage down")
+        ) as save:
+            image = self.upload()
+        self.assertEqual(save.call_count, tasks.IMAGE_UPLOAD_RETRIES + 1)
+        self.assertEqual(image.status, Image.Status.FAILED)
+        self.assertEqual(os.listdir(self.spool_dir.name), [])
+
+    def test_recover_redispatches_lost_uploads(self):
+        # 콜백을 돌리지 않은 채로 두면 재시작으로 큐를 잃은 것과 같습니다
+        with self.captureOnCommitCallbacks():
+            kept = Image.create_image(1, self.object, BytesIO(b"image bytes"))
+            lost = Image.create_image(1, self.object, BytesIO(b"image bytes"))
+        os.remove(Image.spool_path(lost.path))
+        orphan = os.path.join(self.spool_dir.name, "image-orphan.jpeg")
+        open(orphan, "wb").close()
+        os.utime(orphan, (0, 0))
+
+        self.assertEqual(tasks.recover_pending_uploads(older_than=0), 1)
+        kept.refresh_from_db()
+        lost.refresh_from_db()
+        self.assertEqual(kept.status, Image.Status.READY)
+        self.assertEqual(lost.status, Image.Status.FAILED)
+        self.assertEqual(os.listdir(self.spool_dir.name), [])
+
+    def test_eager_create_is_ready_immediately(self):
+        with mock.patch.object(models, "IMAGE_UPLOAD_EAGER", True):
+            image = Image.create_image(1, self.object, BytesIO(b"image bytes"))
+        self.assertEqual(image.status, Image.Status.READY)
+        self.assertEqual(os.listdir(self.spool_dir.name), [])
+
+
+class VariantLimitTest(TestCase):
+    def test_rejects_images_over_pixel_limit(self):
+        source = BytesIO()
+        PILImage.new("RGB", (300, 200)).save(source, "PNG")
+        specs = models.parse_variant_specs("thumb:32x32:png")
+        with mock.patch.object(models, "IMAGE_VARIANTS", specs), mock.patch.object(
+            models, "IMAGE_VARIANT_MAX_PIXELS", 300 * 200 - 1
+        ), mock.patch.object(models, "save_variant") as save_variant:
+            with self.assertRaises(ValueError):
+                models.render_variants(source, "images/test")
+        save_variant.assert_not_called()
+        self.assertEqual(source.tell(), 0)
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import wait
+
+import requests as http
+
+from . import utils
+from .test import StubServer, TestCase
+from .utils import CircuitBreaker, CircuitOpenError, ServerRequests, get_breaker
+
+
+class CircuitBreakerTest(TestCase):
+    def test_opens_and_fails_fast(self):
+        with StubServer([(500, {}, 0.05)]) as server:
+            requests = ServerRequests(server.url, "token")
+            breaker = get_breaker(server.url)
+            for _ in range(breaker.min_calls):
+                self.assertEqual(requests.get("/users/1/").status_code, 500)
+            start = time.monotonic()
+            with self.assertRaises(CircuitOpenError):
+                requests.get("/users/1/")
+            elapsed = time.monotonic() - start
+        # 열린 뒤에는 서버로 보내지 않고 바로 실패합니다
+        self.assertEqual(server.calls, breaker.min_calls)
+        self.assertLess(elapsed, 0.05)
+
+    def test_ignores_results_from_before_opening(self):
+        breaker = CircuitBreaker(min_calls=2, reset_timeout=0.05)
+        in_flight = breaker.allow()
+        for _ in range(2):
+            breaker.record(breaker.allow(), False, 0.01)
+        self.assertEqual(breaker.state, "open")
+        # 열리기 전에 보낸 느린 성공이 회로를 닫지 않습니다
+        breaker.record(in_flight, True, 5.0)
+        self.assertEqual(breaker.state, "open")
+        time.sleep(0.06)
+        trial = breaker.allow()
+        self.assertTrue(trial.trial)
+        self.assertIsNone(breaker.allow())
+        breaker.record(in_flight, False, 5.0)
+        breaker.record(trial, True, 0.01)
+        self.assertEqual(breaker.state, "closed")
+
+
+class HedgedRequestTest(TestCase):
+    def test_hedge_beats_slow_response(self):
+        warmup = [(200, {"slow": False}, 0)] * 10
+        responses = [*warmup, (200, {"slow": True}, 1.0), (200, {"slow": False}, 0)]
+        with StubServer(responses) as server:
+            requests = ServerRequests(server.url, "token", hedge=True)
+            for _ in warmup:
+                requests.get("/users/1/")
+            start = time.monotonic()
+            resp = requests.get("/users/1/")
+            elapsed = time.monotonic() - start
+        self.assertFalse(resp.json()["slow"])
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(server.calls, len(warmup) + 2)
+
+
+class ResponseCacheTest(TestCase):
+    def test_only_cache_hits_are_marked(self):
+        with StubServer([(200, {"user_id": 1})]) as server:
+            requests = ServerRequests(server.url, "token")
+            fresh = requests.get("/users/1/", cache=True, cache_ttl=60)
+            cached = requests.get("/users/1/", cache=True, cache_ttl=60)
+        self.assertFalse(getattr(fresh, "from_cache", False))
+        self.assertTrue(cached.from_cache)
+        self.assertEqual(cached.json(), fresh.json())
+        self.assertEqual(server.calls, 1)
+
+
+class GatherTest(TestCase):
+    def test_nested_gather_does_not_starve_the_pool(self):
+        with StubServer([(200, {"user_id": 1})]) as server:
+            requests = ServerRequests(server.url, "token")
+            busy = threading.Barrier(utils.REQUESTS_POOL_SIZE, timeout=5)
+
+            def fan_out():
+                busy.wait()
+                call = requests.call("GET", "/users/1/")
+                return utils.gather(call, call)
+
+            # 공용 워커를 모두 채운 상태에서 각 워커가 다시 gather 합니다
+            futures = [
+                utils.submit(utils._executor, fan_out)
+                for _ in range(utils.REQUESTS_POOL_SIZE)
+            ]
+            _, pending = wait(futures, timeout=5)
+        self.assertFalse(pending)
+        for future in futures:
+            self.assertEqual([r.status_code for r in future.result()], [200, 200])
+
+
+class SessionPoolTest(TestCase):
+    def fetch(self, server: StubServer, pooled: bool, count: int) -> float:
+        requests = ServerRequests(server.url, "token")
+        start = time.monotonic()
+        for _ in range(count):
+            if pooled:
+                requests.get("/users/1/")
+            else:
+                # 세션 없이 호출마다 새 커넥션을 맺던 이전 방식
+                http.get(f"{server.url}/users/1/", headers={"Authorization": "token"})
+        return time.monotonic() - start
+
+    def test_pooled_requests_reuse_one_connection(self):
+        with StubServer() as pooled:
+            self.fetch(pooled, True, 20)
+        with StubServer() as unpooled:
+            self.fetch(unpooled, False, 20)
+        self.assertEqual(pooled.connections, 1)
+        self.assertEqual(unpooled.connections, 20)
+
+    @unittest.skipUnless(os.getenv("BENCHMARK"), "BENCHMARK 환경변수 필요")
+    def test_pooled_vs_unpooled_latency(self):
+        count = 500
+        with StubServer() as server:
+            self.fetch(server, True, 10)
+            pooled = self.fetch(server, True, count)
+            unpooled = self.fetch(server, False, count)
+        print(
+            f"\npooled {pooled / count * 1e3:.3f} ms/req,"
+            f" unpooled {unpooled / count * 1e3:.3f} ms/req"
+        )
+        self.assertLess(pooled, unpooled)
@@ -1,8 +1,29 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
 import os
+import threading
+import time
 import requests
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
 from datetime import datetime
 from calendar import timegm
-from typing import Literal, TypedDict, Any
+from typing import (
+    Callable,
+    Iterable,
+    Literal,
+    NamedTuple,
+    Optional,
+    TypedDict,
+    Any,
+    TypeVar,
+)
 
 from django.utils.datastructures import MultiValueDict
 from django.http.request import HttpRequest
@@ -33,38 +54,511 @@ class MockRequest(HttpRequest, Request):
     query_params: QueryDict
 
 
+REQUESTS_POOL_SIZE = int(os.getenv("REQUESTS_POOL_SIZE", "32"))
+REQUESTS_TIMEOUT = float(os.getenv("REQUESTS_TIMEOUT", "5"))
+REQUESTS_RETRIES = int(os.getenv("REQUESTS_RETRIES", "2"))
+REQUESTS_BACKOFF = float(os.getenv("REQUESTS_BACKOFF", "0.1"))
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+# 서버간 요청을 동시에 보내기 위한 공용 워커 (세션 커넥션 풀 크기와 맞춥니다)
+_executor = ThreadPoolExecutor(
+    max_workers=REQUESTS_POOL_SIZE, thread_name_prefix="server-requests"
+)
+
+# hedge 요청 전용 워커 (gather 워커 안에서 hedge 해도 막히지 않도록 분리)
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=REQUESTS_POOL_SIZE, thread_name_prefix="server-requests-hedge"
+)
+
+# gather 를 _executor 워커 안에서 부를 때 쓰는 워커. 같은 풀을 기다리면
+# 풀이 꽉 찼을 때 서로를 기다리며 멈출 수 있습니다
+_fanout_executor = ThreadPoolExecutor(
+    max_workers=REQUESTS_POOL_SIZE, thread_name_prefix="server-requests-fanout"
+)
+
+R = TypeVar("R")
+
+
+def submit(executor: ThreadPoolExecutor, call: Callable[..., R], *args, **kwargs):
+    # 요청 deadline 같은 contextvar 를 워커 쓰레드로 넘깁니다
+    context = contextvars.copy_context()
+    return executor.submit(context.run, call, *args, **kwargs)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    회로가 열려 있어서 요청을 보내지 않았습니다
+    """
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    요청 전체 deadline 이 지나 서버간 요청을 보내지 않았습니다
+    """
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "0"))
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    이 블록 안의 서버간 요청 timeout 을 남은 시간 이하로 줄입니다.
+    이미 더 짧은 deadline 이 있으면 그대로 둡니다.
+    """
+    current = _deadline.get()
+    target = time.monotonic() + seconds
+    token = _deadline.set(target if current is None else min(current, target))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    current = _deadline.get()
+    if current is None:
+        return None
+    return current - time.monotonic()
+
+
+class DeadlineMiddleware:
+    """
+    요청마다 REQUEST_DEADLINE 초 (또는 X-Request-Timeout 헤더 중 짧은 쪽) 의
+    deadline 을 둡니다. 서버간 요청은 남은 시간을 timeout 으로 쓰고 헤더로 전달합니다.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        seconds = REQUEST_DEADLINE or None
+        upstream = request.META.get("HTTP_X_REQUEST_TIMEOUT")
+        try:
+            if upstream:
+                seconds = min(float(upstream), seconds or float(upstream))
+        except ValueError:
+            pass
+        if not seconds:
+            return self.get_response(request)
+        with deadline(seconds):
+            return self.get_response(request)
+
+
+class Permit(NamedTuple):
+    # allow() 가 허용한 호출. epoch 는 허용 시점의 회로 상태 번호
+    epoch: int
+    trial: bool
+
+
+class CircuitBreaker:
+    """
+    호스트별 회로 차단기
+    최근 window 개 호출 중 실패(연결 오류, 5xx, slow_call 초과) 비율이
+    failure_rate 이상이면 reset_timeout 초 동안 바로 실패시키고,
+    그 뒤 한 번의 시험 호출이 성공하면 다시 닫습니다.
+    회로가 열리기 전에 보낸 호출의 결과는 열린 뒤에 도착해도 무시합니다.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")),
+        min_calls: int = int(os.getenv("CIRCUIT_MIN_CALLS", "10")),
+        window: int = int(os.getenv("CIRCUIT_WINDOW", "50")),
+        slow_call: float = float(os.getenv("CIRCUIT_SLOW_CALL", "0")),
+        reset_timeout: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "10")),
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call = slow_call
+        self.reset_timeout = reset_timeout
+        self.results: deque[bool] = deque(maxlen=window)
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.opened_at: Optional[float] = None
+        self.trial = False
+        # 회로가 열리거나 닫힐 때마다 올립니다
+        self.epoch = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> Literal["closed", "open", "half_open"]:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> Optional[Permit]:
+        # 거절하면 None
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return Permit(self.epoch, False)
+            if state == "half_open" and not self.trial:
+                self.trial = True
+                return Permit(self.epoch, True)
+            return None
+
+    def record(self, permit: Permit, success: bool, duration: float):
+        if self.slow_call and duration > self.slow_call:
+            success = False
+        with self._lock:
+            self.latencies.append(duration)
+            if permit.trial:
+                # 시험 호출 결과로 열지 닫을지 정합니다
+                self.trial = False
+                self.opened_at = None if success else time.monotonic()
+                self.results.clear()
+                self.epoch += 1
+                return
+            if permit.epoch != self.epoch or self.opened_at is not None:
+                return
+            self.results.append(success)
+            failures = self.results.count(False)
+            if (
+                len(self.results) >= self.min_calls
+                and failures / len(self.results) >= self.failure_rate
+            ):
+                self.opened_at = time.monotonic()
+                self.epoch += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self.latencies) < self.min_calls:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _sessions_lock:
+            breaker = _breakers.setdefault(host, CircuitBreaker())
+    return breaker
+
+
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+
+RESPONSE_CACHE_KEY = lambda x: f"GATEWAY:response:{x}"
+# Cache-Control 이 없을 때의 기본 TTL
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "0"))
+# 만료 후에도 ETag/Last-Modified 재검증용으로 보관하는 시간
+RESPONSE_CACHE_STALE = int(os.getenv("RESPONSE_CACHE_STALE", "600"))
+
+
+class CachedResponse(requests.Response):
+    """
+    캐시에서 만든 응답. json() 은 저장할 때 파싱해둔 값을 그대로 반환합니다
+    """
+
+    from_cache = True
+    _json: Any = None
+
+    def json(self, **kwargs):
+        if self._json is not None:
+            return self._json
+        return super().json(**kwargs)
+
+
+def get_session(host: str) -> requests.Session:
+    """
+    호스트별로 프로세스 전체에서 공유하는 keep-alive 세션
+    멱등 요청은 502/503/504 나 연결 오류시 backoff 후 재시도합니다.
+    """
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            retry = Retry(
+                total=REQUESTS_RETRIES,
+                backoff_factor=REQUESTS_BACKOFF,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=REQUESTS_POOL_SIZE, max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+    return session
+
+
 class ServerRequests:
     token: str
+    # True 면 get() 응답을 캐시합니다 (호출마다 cache=False 로 건너뛸 수 있음)
+    cache: bool = False
+    # 경로 prefix -> TTL(초). Cache-Control 보다 우선합니다
+    route_ttls: dict[str, int] = {}
 
-    def __init__(self, host: str, token: str):
+    def __init__(
+        self,
+        host: str,
+        token: str,
+        timeout: float = REQUESTS_TIMEOUT,
+        hedge: bool = False,
+    ):
         self.host = host
         self.token = token
+        self.timeout = timeout
+        # True 면 GET 이 느릴때 같은 요청을 한번 더 보내 먼저 온 응답을 씁니다
+        self.hedge = hedge
+        self.session = get_session(host)
+        self.breaker = get_breaker(host)
 
-    def get(self, url, params=None, **kwargs):
-        return requests.get(
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        headers = {"Authorization": self.token, **kwargs.pop("headers", {})}
+        hedge = kwargs.pop("hedge", self.hedge) and method in ("GET", "HEAD")
+        timeout = kwargs.pop("timeout", self.timeout)
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceeded(f"deadline exceeded before {method} {url}")
+            timeout = min(timeout, remaining)
+            headers["X-Request-Timeout"] = f"{remaining:.3f}"
+        permit = self.breaker.allow()
+        if permit is None:
+            raise CircuitOpenError(f"circuit open for {self.host}")
+        send = functools.partial(
+            self.session.request,
+            method,
             self.host + url,
-            params=params,
-            headers={"Authorization": self.token},
-            timeout=2,
+            headers=headers,
+            timeout=timeout,
             **kwargs,
         )
+        start = time.monotonic()
+        try:
+            resp = self._hedged(send) if hedge else send()
+        except Exception:
+            self.breaker.record(permit, False, time.monotonic() - start)
+            raise
+        self.breaker.record(permit, resp.status_code < 500, time.monotonic() - start)
+        return resp
+
+    def _hedged(self, send: Callable[[], requests.Response]) -> requests.Response:
+        delay = self.breaker.percentile(HEDGE_PERCENTILE)
+        if delay is None:
+            return send()
+        first = submit(_hedge_executor, send)
+        done, _ = wait([first], delay)
+        if done:
+            return first.result()
+        second = submit(_hedge_executor, send)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None:
+            # 먼저 끝난 쪽이 실패했으면 나머지 결과를 기다립니다
+            return (second if winner is first else first).result()
+        return winner.result()
+
+    def get(self, url, params=None, cache=None, cache_ttl=None, **kwargs):
+        """
+        cache 가 켜져 있으면 host, 경로, params, 토큰 별로 응답을 캐시합니다.
+        만료 전에는 요청을 보내지 않고, 만료 후에는 If-None-Match /
+        If-Modified-Since 로 재검증해서 304 면 저장된 본문을 씁니다.
+        캐시에서 나간 응답만 CachedResponse (from_cache=True) 이고, 새로 받은
+        200 은 저장만 하고 원래 응답을 그대로 돌려줍니다.
+        """
+        if not (self.cache if cache is None else cache):
+            return self.request("GET", url, params=params, **kwargs)
+        from .caches import cache as _cache
+
+        key = self.response_cache_key(url, params)
+        entry = _cache.get(key)
+        if entry and entry["expires"] > time.time():
+            return self.build_cached_response(entry)
+        headers = dict(kwargs.pop("headers", {}))
+        if entry and entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry and entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        resp = self.request("GET", url, params=params, headers=headers, **kwargs)
+        if resp.status_code == 304 and entry:
+            ttl = self.response_ttl(url, resp, cache_ttl)
+            if ttl is not None:
+                entry["expires"] = time.time() + ttl
+                _cache.set(key, entry, self.response_store_timeout(entry, ttl))
+            return self.build_cached_response(entry)
+        if resp.status_code == 200:
+            ttl = self.response_ttl(url, resp, cache_ttl)
+            if ttl is not None:
+                entry = self.make_cache_entry(resp, ttl)
+                _cache.set(key, entry, self.response_store_timeout(entry, ttl))
+        return resp
+
+    def response_cache_key(self, url: str, params=None) -> str:
+        scope = hashlib.sha256(self.token.encode()).hexdigest()
+        items = sorted((params or {}).items()) if isinstance(params, dict) else params
+        raw = f"{self.host}|{url}|{items!r}|{scope}"
+        return RESPONSE_CACHE_KEY(hashlib.sha256(raw.encode()).hexdigest())
+
+    def response_ttl(
+        self, url: str, resp: requests.Response, cache_ttl: Optional[int]
+    ) -> Optional[int]:
+        # None 이면 캐시하지 않습니다
+        if cache_ttl is not None:
+            return cache_ttl
+        routes = [prefix for prefix in self.route_ttls if url.startswith(prefix)]
+        if routes:
+            return self.route_ttls[max(routes, key=len)]
+        directives = {}
+        for part in resp.headers.get("Cache-Control", "").split(","):
+            name, _, value = part.strip().partition("=")
+            directives[name.lower()] = value
+        if "no-store" in directives or "private" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0
+        if directives.get("max-age", "").isdigit():
+            return int(directives["max-age"])
+        return RESPONSE_CACHE_TTL
+
+    def response_store_timeout(self, entry: dict, ttl: int) -> int:
+        headers = entry["headers"]
+        validators = headers.get("ETag") or headers.get("Last-Modified")
+        return ttl + RESPONSE_CACHE_STALE if validators else ttl
+
+    def make_cache_entry(self, resp: requests.Response, ttl: int) -> dict:
+        parsed = None
+        if "json" in resp.headers.get("Content-Type", ""):
+            try:
+                parsed = resp.json()
+            except ValueError:
+                parsed = None
+        keep = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+        return {
+            "status": resp.status_code,
+            "headers": {k: resp.headers[k] for k in keep if k in resp.headers},
+            "content": resp.content,
+            "encoding": resp.encoding,
+            "url": resp.url,
+            "json": parsed,
+            "expires": time.time() + ttl,
+        }
+
+    def build_cached_response(self, entry: dict) -> CachedResponse:
+        resp = CachedResponse()
+        resp.status_code = entry["status"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp._content = entry["content"]
+        resp.encoding = entry["encoding"]
+        resp.url = entry["url"]
+        resp._json = entry["json"]
+        return resp
 
     def post(self, url, params=None, json=None, **kwargs):
-        return requests.post(
-            self.host + url,
-            params=params,
-            json=json,
-            headers={"Authorization": self.token},
-            **kwargs,
-        )
+        return self.request("POST", url, params=params, json=json, **kwargs)
 
     def patch(self, url, data=None, **kwargs):
-        return requests.get(
-            self.host + url, data=data, headers={"Authorization": self.token}, **kwargs
-        )
+        return self.request("PATCH", url, data=data, **kwargs)
 
     def delete(self, url, **kwargs):
-        return requests.delete(self.host + url, **kwargs)
+        return self.request("DELETE", url, **kwargs)
+
+    def call(self, method: str, url: str, **kwargs) -> Callable[[], requests.Response]:
+        # gather 에 넘길 요청. timeout 으로 호출별 deadline 을 줄 수 있습니다
+        return functools.partial(self.request, method, url, **kwargs)
+
+    async def arequest(self, method: str, url: str, **kwargs) -> requests.Response:
+        # 이벤트 루프를 막지 않도록 공용 워커에서 풀링된 세션으로 보냅니다
+        future = submit(_executor, self.request, method, url, **kwargs)
+        return await asyncio.wrap_future(future)
+
+    async def aget(self, url, params=None, **kwargs):
+        # 응답 캐시 조회도 워커에서 하도록 get 을 통째로 넘깁니다
+        future = submit(_executor, self.get, url, params=params, **kwargs)
+        return await asyncio.wrap_future(future)
+
+    async def apost(self, url, params=None, json=None, **kwargs):
+        return await self.arequest("POST", url, params=params, json=json, **kwargs)
+
+    async def apatch(self, url, data=None, **kwargs):
+        return await self.arequest("PATCH", url, data=data, **kwargs)
+
+    async def adelete(self, url, **kwargs):
+        return await self.arequest("DELETE", url, **kwargs)
+
+
+def _collect(futures: list[Future], pending: set) -> list[Any]:
+    results: list[Any] = []
+    for future in futures:
+        if future in pending:
+            future.cancel()
+            results.append(TimeoutError("deadline exceeded"))
+        elif future.exception() is not None:
+            results.append(future.exception())
+        else:
+            results.append(future.result())
+    return results
+
+
+def gather(*calls: Callable[[], R], timeout: Optional[float] = None) -> list[Any]:
+    """
+    여러 서버간 요청을 동시에 보내고 입력 순서대로 결과를 반환합니다.
+    timeout 은 전체 deadline 이며, 그 안에 끝나지 않은 호출과 실패한 호출은
+    결과 자리에 예외 객체가 들어갑니다. sync 뷰에서 바로 쓸 수 있습니다.
+    aget 이나 다른 gather 의 워커 안에서 불러도 막히지 않습니다.
+        user, assets = gather(
+            requests.auth.call("GET", "/users/1/", timeout=1),
+            requests.assets.call("GET", "/assets/"),
+            timeout=2,
+        )
+    """
+    executor = _gather_executor()
+    if executor is None:
+        return [_call_inline(call) for call in calls]
+    futures = [submit(executor, call) for call in calls]
+    _, pending = wait(futures, timeout)
+    return _collect(futures, pending)
+
+
+def _gather_executor() -> Optional[ThreadPoolExecutor]:
+    # 워커 쓰레드 이름은 "{prefix}_{n}" 입니다
+    prefix = threading.current_thread().name.rpartition("_")[0]
+    if prefix == "server-requests":
+        return _fanout_executor
+    if prefix == "server-requests-fanout":
+        # 두 단계 넘게 중첩되면 지금 쓰레드에서 차례로 보냅니다
+        return None
+    return _executor
+
+
+def _call_inline(call: Callable[[], R]) -> Any:
+    try:
+        return call()
+    except Exception as exc:
+        return exc
+
+
+async def agather(*calls: Callable[[], R], timeout: Optional[float] = None):
+    # gather 의 async 버전
+    futures = [submit(_executor, call) for call in calls]
+    if not futures:
+        return []
+    wrapped = {asyncio.wrap_future(f): f for f in futures}
+    _, pending = await asyncio.wait(wrapped.keys(), timeout=timeout)
+    return _collect(futures, {wrapped[p] for p in pending})
+
+
+USER_LOOKUP_KEY = lambda x: f"GATEWAY:user_lookup:{x}"
+USER_LOOKUP_TTL = int(os.getenv("USER_LOOKUP_TTL", "30"))
+# 설정하면 GET {path}?ids=1,2,3 로 여러 유저를 한번에 조회합니다
+AUTH_USERS_BATCH_PATH = os.getenv("AUTH_USERS_BATCH_PATH")
+AUTH_USERS_BATCH_SIZE = int(os.getenv("AUTH_USERS_BATCH_SIZE", "100"))
 
 
 class RequestModule:
@@ -75,12 +569,74 @@ class RequestModule:
         self.auth = ServerRequests(AUTH_SERVER, token)
         ASSET_SERVER = os.getenv("ASSET_SERVER", "")
         self.assets = ServerRequests(ASSET_SERVER, token)
+        # 요청 안에서 이미 조회한 유저 (DataLoader 캐시)
+        self._users: dict[str, int | Literal[False]] = {}
+
+    def gather(self, *calls: Callable[[], R], timeout: Optional[float] = None):
+        return gather(*calls, timeout=timeout)
+
+    async def agather(self, *calls: Callable[[], R], timeout: Optional[float] = None):
+        return await agather(*calls, timeout=timeout)
 
     def get_user(self, user_id: str | int) -> (int | Literal[False]):
-        resp = self.auth.get(f"/users/{user_id}/")
-        if resp.status_code is not 200:
-            return False
-        return resp.json().get("id")
+        return self.get_users([user_id])[str(user_id)]
+
+    def get_users(
+        self, user_ids: Iterable[str | int]
+    ) -> dict[str, int | Literal[False]]:
+        """
+        중복을 제거한 뒤 요청 캐시 -> 공용 캐시 -> 인증서버 순으로 조회합니다.
+        반환값은 str(user_id) -> id (없는 유저는 False)
+        """
+        from .caches import cache
+
+        ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        missing = [user_id for user_id in ids if user_id not in self._users]
+        if missing:
+            cached = cache.get_many([USER_LOOKUP_KEY(user_id) for user_id in missing])
+            for user_id in missing:
+                if USER_LOOKUP_KEY(user_id) in cached:
+                    self._users[user_id] = cached[USER_LOOKUP_KEY(user_id)]
+            remaining = [user_id for user_id in missing if user_id not in self._users]
+            if remaining:
+                fetched = self.fetch_users(remaining)
+                self._users.update(fetched)
+                cache.set_many(
+                    {USER_LOOKUP_KEY(k): v for k, v in fetched.items()},
+                    USER_LOOKUP_TTL,
+                )
+        # 조회에 실패한 유저는 캐시하지 않고 False 로 반환합니다
+        return {user_id: self._users.get(user_id, False) for user_id in ids}
+
+    def fetch_users(self, user_ids: list[str]) -> dict[str, int | Literal[False]]:
+        # 확정된 결과(200, 404)만 반환합니다. 반환값은 토큰과 무관하게 공용 캐시에 저장되므로
+        # 토큰 만료(401/403), 429, 5xx, 연결 오류는 제외합니다
+        found: dict[str, int | Literal[False]] = {}
+        if AUTH_USERS_BATCH_PATH:
+            chunks = [
+                user_ids[i : i + AUTH_USERS_BATCH_SIZE]
+                for i in range(0, len(user_ids), AUTH_USERS_BATCH_SIZE)
+            ]
+            calls = [
+                self.auth.call(
+                    "GET", AUTH_USERS_BATCH_PATH, params={"ids": ",".join(chunk)}
+                )
+                for chunk in chunks
+            ]
+            for chunk, resp in zip(chunks, self.gather(*calls)):
+                if isinstance(resp, Exception) or resp.status_code != 200:
+                    continue
+                found.update({user_id: False for user_id in chunk})
+                for user in resp.json():
+                    found[str(user.get("id"))] = user.get("id")
+            return found
+        # 배치 API 가 없으면 유저별 요청을 동시에 보냅니다
+        calls = [self.auth.call("GET", f"/users/{user_id}/") for user_id in user_ids]
+        for user_id, resp in zip(user_ids, self.gather(*calls)):
+            if isinstance(resp, Exception) or resp.status_code not in (200, 404):
+                continue
+            found[user_id] = resp.json().get("id") if resp.status_code == 200 else False
+        return found
 
 
 def make_utc(dt):
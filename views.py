@@ -1,12 +1,14 @@
-from typing import Generic, Iterable, Optional, Any, TypeVar
+from typing import Generic, Iterable, Literal, Optional, Any, TypeVar
 from rest_framework import viewsets
 from typing import Any, Callable
+from django.db import transaction
 from django.db.models import QuerySet
 
 from rest_framework import exceptions, viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from common_module.caches import UseSingleCache
 from common_module.models import CommonModel
 
 from .utils import MockRequest, RequestModule
@@ -17,9 +19,14 @@ T = TypeVar("T", bound=CommonModel)
 class UseTokenizedRequestsMixin:
     request: MockRequest
 
+    _requests: Optional[RequestModule] = None
+
     @property
     def requests(self):
-        return RequestModule(self.http_authorization)
+        # 뷰 인스턴스(요청)마다 하나만 만듭니다
+        if self._requests is None:
+            self._requests = RequestModule(self.http_authorization)
+        return self._requests
 
     @property
     def http_authorization(self):
@@ -59,7 +66,95 @@ class BaseMixinWrapper(viewsets.ModelViewSet, Generic[T]):
         return super().get_serializer(*args, **kwargs)
 
 
-class BaseMixin(BaseMixinWrapper[T]):
+class CachedResponseMixin(BaseMixinWrapper[T]):
+    """
+    조회 결과를 캐시합니다. cache_timeouts 에 action 별 TTL(초)을 지정하면 켜집니다.
+        cache_timeouts = {"list": 30, "not_paginated": 60, "my_resources": 10}
+    키는 모델, 유저, 쿼리 파라미터(커서 포함), url kwargs 로 만듭니다.
+    X-Cache-Bypass 헤더나 Cache-Control: no-cache 요청은 캐시를 건너뜁니다.
+    생성/수정/삭제시 cache_invalidate_scope 에 따라 모델 전체 또는 작성자 캐시를 비웁니다.
+    """
+
+    cache_timeouts: dict[str, int] = {}
+    cache_invalidate_scope: Literal["model", "user"] = "model"
+
+    def get_response_cache(self, user_id: int) -> UseSingleCache:
+        model_name = self.get_queryset().model.__name__.lower()
+        return UseSingleCache(user_id, f"{model_name}:views")
+
+    def get_cache_user_id(self) -> int:
+        # InternalJWTAuthentication 은 auth 에 Token, user 에 User 모델을 넣습니다
+        if self.request.auth:
+            return self.request.auth["user_id"] or 0
+        user = self.request.user
+        if not user or not getattr(user, "is_authenticated", True):
+            return 0
+        if isinstance(user, dict):
+            return user.get("user_id") or 0
+        return getattr(user, "pk", None) or 0
+
+    def is_cache_bypassed(self) -> bool:
+        if self.request.META.get("HTTP_X_CACHE_BYPASS"):
+            return True
+        return "no-cache" in self.request.META.get("HTTP_CACHE_CONTROL", "")
+
+    def cached_response(self, build: Callable[[], Response]) -> Response:
+        timeout = self.cache_timeouts.get(self.action)
+        if not timeout or self.is_cache_bypassed():
+            return build()
+        computed: list[Response] = []
+
+        def loader():
+            response = build()
+            computed.append(response)
+            return response.data
+
+        data = self.get_response_cache(self.get_cache_user_id()).get_or_compute(
+            loader,
+            timeout,
+            action=self.action,
+            params=sorted(self.request.query_params.lists()),
+            url_kwargs=sorted(self.kwargs.items()),
+        )
+        if computed:
+            response = computed[0]
+            response["X-Cache"] = "MISS"
+            return response
+        response = Response(data)
+        response["X-Cache"] = "HIT"
+        return response
+
+    def invalidate_response_cache(self):
+        if not self.cache_timeouts:
+            return
+        response_cache = self.get_response_cache(self.get_cache_user_id())
+        if self.cache_invalidate_scope == "user":
+            response_cache.invalidate_user()
+        else:
+            response_cache.invalidate_model()
+
+    # 커밋 전에 세대를 올리면 그 사이 읽은 요청이 이전 데이터를 새 세대로 캐시합니다
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        using = serializer.instance._state.db
+        transaction.on_commit(self.invalidate_response_cache, using=using)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        using = serializer.instance._state.db
+        transaction.on_commit(self.invalidate_response_cache, using=using)
+
+    def perform_destroy(self, instance):
+        using = instance._state.db
+        super().perform_destroy(instance)
+        transaction.on_commit(self.invalidate_response_cache, using=using)
+
+    def list(self, request, *args, **kwargs):
+        parent = super()
+        return self.cached_response(lambda: parent.list(request, *args, **kwargs))
+
+
+class BaseMixin(CachedResponseMixin[T]):
     @action(methods=["GET"], detail=False, url_path="count")
     def count_resources(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -67,27 +162,34 @@ class BaseMixin(BaseMixinWrapper[T]):
 
     @action(methods=["GET"], detail=False, url_path="flat")
     def not_paginated(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        limit = self.request.query_params.get("limit")
-        if limit and limit.isdigit():
-            queryset = queryset[: int(limit)]
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        def build():
+            queryset = self.filter_queryset(self.get_queryset())
+            limit = self.request.query_params.get("limit")
+            if limit and limit.isdigit():
+                queryset = queryset[: int(limit)]
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+
+        return self.cached_response(build)
 
     @action(methods=["GET"], detail=False, url_path="me")
     def my_resources(self, request, *args, **kwargs):
         if not self.request.user:
             raise exceptions.NotAuthenticated
         user_id = self.request.user.get("user_id")
-        queryset = self.filter_queryset(self.get_queryset().filter(user_id=user_id))
 
-        page = self.paginate_queryset(queryset)
-        if page != None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        def build():
+            queryset = self.filter_queryset(self.get_queryset().filter(user_id=user_id))
+
+            page = self.paginate_queryset(queryset)
+            if page != None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.cached_response(build)
 
     @action(methods=["POST"], detail=False, url_path="bulk")
     def create_bulk(self, request, *args, **kwargs):